@@ -1,18 +1,58 @@
 from openai import OpenAI
 
+from agents.response_cache import ResponseCache
+from parsers.browser_pool import DEFAULT_VIEWPORT, BrowserPool
 from parsers.website_parser import WebsiteParser as wp
 
 import base64
+import os
 import re
 
+from tools.images import DEFAULT_FORMAT, DEFAULT_MAX_HEIGHT, DEFAULT_QUALITY, prepare_screenshot
 from tools.keys import get_secret
 
 OPEN_AI_API_KEY = get_secret("OPENAI_API_KEY")
+MODEL = "gpt-4.1"
 
 
 class LeadsAgent:
-    def __init__(self):
+    def __init__(
+        self,
+        cache=None,
+        use_cache=True,
+        screenshot_format=DEFAULT_FORMAT,
+        screenshot_quality=DEFAULT_QUALITY,
+        screenshot_max_height=DEFAULT_MAX_HEIGHT,
+        viewport=None,
+    ):
         self.base_model = OpenAI(api_key=OPEN_AI_API_KEY)
+        self.cache = (cache or ResponseCache()) if use_cache else None
+        # How UI report screenshots are encoded for the model; see tools.images
+        self.screenshot_format = screenshot_format
+        self.screenshot_quality = screenshot_quality
+        self.screenshot_max_height = screenshot_max_height
+        if viewport is not None or screenshot_max_height != DEFAULT_MAX_HEIGHT:
+            # Captures come from the shared browser, which would otherwise clip at the default height
+            BrowserPool.configure(viewport=viewport or DEFAULT_VIEWPORT, max_height=screenshot_max_height)
+
+    def _respond(self, content: list):
+        """
+        Send a single user message to the model and return the output text.
+        Identical inputs are served from the response cache.
+        """
+        input = [{"role": "user", "content": content}]
+
+        if self.cache:
+            key = self.cache.make_key(MODEL, input)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        resp = self.base_model.responses.create(model=MODEL, input=input)
+
+        if self.cache:
+            self.cache.set(key, MODEL, resp.output_text)
+        return resp.output_text
 
     def generate_ui_report(self, url: str):
         """
@@ -20,12 +60,31 @@ class LeadsAgent:
         Saves a screenshot of the site and sends it to the AI for analysis.
         """
         try:
-            # Take screenshot
-            screenshot_path = wp.take_screenshot(url)
+            return self._respond(self.ui_report_content(url))
+
+        except Exception as e:
+            print(e)
+
+    def ui_report_content(self, url: str):
+        """Take a screenshot of the site and build the UI report input"""
+        # Take screenshot
+        screenshot_path = wp.take_screenshot(url)
+        try:
             with open(screenshot_path, "rb") as image_file:
-                image_64 = base64.b64encode(image_file.read()).decode("utf-8")
-            # Prompt for UI analysis only
-            prompt = """
+                # Cropped, downscaled to what the model looks at and compressed
+                image = prepare_screenshot(
+                    image_file.read(),
+                    fmt=self.screenshot_format,
+                    quality=self.screenshot_quality,
+                    max_height=self.screenshot_max_height,
+                )
+        finally:
+            if os.path.exists(screenshot_path):
+                os.remove(screenshot_path)
+        print(f"        🖼️  Screenshot: {image.summary()}")
+        image_64 = base64.b64encode(image.data).decode("utf-8")
+        # Prompt for UI analysis only
+        prompt = """
     You are an experienced web developer and UI designer.
 
     Analyze the website screenshot.
@@ -36,35 +95,28 @@ class LeadsAgent:
     Keep response concise (max 200 words). Be specific and actionable.
     """
 
-            resp = self.base_model.responses.create(
-                model="gpt-4.1",
-                input=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_text", "text": prompt},
-                            {
-                                "type": "input_image",
-                                "image_url": f"data:image/jpeg;base64,{image_64}",
-                            },
-                        ],
-                    }
-                ],
-            )
-
-            return resp.output_text
-
-        except Exception as e:
-            print(e)
+        return [
+            {"type": "input_text", "text": prompt},
+            {
+                "type": "input_image",
+                "image_url": f"data:{image.mime};base64,{image_64}",
+            },
+        ]
 
     def generate_business_brief(self, url: str):
         """
         Analyze business website and generates a brief about it
         """
         try:
-            page_contents = wp.crawl_website(url)
+            return self._respond(self.business_brief_content(url))
 
-            prompt = f"""
+        except Exception as e:
+            print(e)
+
+    def business_brief_content(self, url: str):
+        page_contents = wp.crawl_website(url)
+
+        prompt = f"""
 You are a consultant at a company that provides automation (operations, sales, support), website redesign, organizational and process consulting, and bookkeeping/accounting services. 
 
 I will give you raw text content scraped from a potential client’s website. 
@@ -83,33 +135,24 @@ Here is the content:
 Keep the response concise (max 200 words) but specific and insightful.
 """
 
-            resp = self.base_model.responses.create(
-                model="gpt-4.1",
-                input=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "input_text", "text": prompt},
-                        ],
-                    }
-                ],
-            )
-
-            return resp.output_text
-
-        except Exception as e:
-            print(e)
+        return [{"type": "input_text", "text": prompt}]
 
     def generate_pain_points(self, brief: str, ui_report: str, reviews: list):
         """
         Generate a pain point report using a precomputed brief, UI report, and reviews.
         """
         try:
-            google_map_reviews = "\n".join(
-                [f"Review {idx + 1}: {review['text']['text']}" for idx, review in enumerate(reviews)]
-            )
+            return self._respond(self.pain_points_content(brief, ui_report, reviews))
 
-            prompt = f"""
+        except Exception as e:
+            print(e)
+
+    def pain_points_content(self, brief: str, ui_report: str, reviews: list):
+        google_map_reviews = "\n".join(
+            [f"Review {idx + 1}: {review['text']['text']}" for idx, review in enumerate(reviews)]
+        )
+
+        prompt = f"""
 You are a consultant at a company that provides automation (operations, sales, support), website redesign, organizational/process consulting, and bookkeeping/accounting services.  
 
 I will provide you with three types of input:  
@@ -148,20 +191,7 @@ Google Maps Reviews:
 Keep response concise (max 150 words). Be specific and actionable.
 """
 
-            resp = self.base_model.responses.create(
-                model="gpt-4.1",
-                input=[
-                    {
-                        "role": "user",
-                        "content": [{"type": "input_text", "text": prompt}],
-                    }
-                ],
-            )
-
-            return resp.output_text
-
-        except Exception as e:
-            print(e)
+        return [{"type": "input_text", "text": prompt}]
 
     def generate_personalized_email(self, email:str, business_name: str, brief: str, pain_point_report: str):
         """
@@ -171,7 +201,15 @@ Keep response concise (max 150 words). Be specific and actionable.
         - 1 simple CTA
         """
         try:
-            prompt = f"""
+            return self._respond(
+                self.personalized_email_content(email, business_name, brief, pain_point_report)
+            )
+
+        except Exception as e:
+            print(e)
+
+    def personalized_email_content(self, email: str, business_name: str, brief: str, pain_point_report: str):
+        prompt = f"""
 You are a professional B2B sales copywriter. Your name is Nico Constantin and you are the director of operations at Student Brains Consulting.
 
 Description about Student Brains Consulting:
@@ -204,24 +242,13 @@ Format:
 Tone: professional but approachable. No fluff, no jargon. Keep it under 150 words. Do not return markdown formatted text.
 """
 
-
-            resp = self.base_model.responses.create(
-                model="gpt-4.1",
-                input=[
-                    {
-                        "role": "user",
-                        "content": [{"type": "input_text", "text": prompt}],
-                    }
-                ],
-            )
-
-            return resp.output_text
-
-        except Exception as e:
-            print(e)
+        return [{"type": "input_text", "text": prompt}]
 
     def generate_email_subject(self, business_name: str, brief: str):
         """Generate a personalized email subject line"""
+        return self._respond(self.email_subject_content(business_name, brief)).strip()
+
+    def email_subject_content(self, business_name: str, brief: str):
         prompt = f"""
 Generate a compelling cold email subject line for {business_name}.
 
@@ -236,11 +263,6 @@ Requirements:
 
 Return ONLY the subject line, no quotes or extra text.
 """
-    
-        resp = self.base_model.responses.create(
-            model="gpt-4.1",
-            input=[{"role": "user", "content": [{"type": "input_text", "text": prompt}]}]
-        )
-        
-        return resp.output_text.strip()
+
+        return [{"type": "input_text", "text": prompt}]
 
@@ -0,0 +1,219 @@
+import json
+import os
+import time
+
+from agents.leads_agent import MODEL
+
+BATCH_ENDPOINT = "/v1/responses"
+DEFAULT_BATCH_DIR = os.path.join(".cache", "batches")  # request files, next to the LLM response cache
+
+# Reports are requested in waves because later prompts embed earlier outputs:
+# pain points need the brief and UI report, the subject needs the brief,
+# the email needs the brief and pain points.
+WAVES = [
+    ("ui_report", "brief"),
+    ("pain_point_report", "email_subject"),
+    ("email_sample",),
+]
+
+
+def _report_content(agent, place, field):
+    """Return the content list for one report of a place, or None if its inputs are missing"""
+    if field == "ui_report":
+        return agent.ui_report_content(place.website_uri)
+    if field == "brief":
+        return agent.business_brief_content(place.website_uri)
+    if field == "pain_point_report":
+        if place.brief is None:
+            return None
+        return agent.pain_points_content(place.brief, place.ui_report, place.reviews[:5])
+    if field == "email_subject":
+        if place.brief is None:
+            return None
+        return agent.email_subject_content(place.display_name, place.brief)
+    if field == "email_sample":
+        if place.brief is None or place.pain_point_report is None:
+            return None
+        return agent.personalized_email_content(
+            place.emails[0], place.display_name, place.brief, place.pain_point_report
+        )
+    raise ValueError(f"Unknown report field: {field}")
+
+
+def output_text(body: dict):
+    """Pull the text out of a raw /v1/responses body (the SDK's resp.output_text)"""
+    if body.get("output_text"):
+        return body["output_text"]
+    parts = []
+    for item in body.get("output", []):
+        for content in item.get("content", []) or []:
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts)
+
+
+class OpenAIBatchRunner:
+    """Submits a JSONL request file to the OpenAI Batch API and waits for the results"""
+
+    def __init__(self, client, poll_interval=60, completion_window="24h"):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def run(self, request_path: str, output_path: str):
+        with open(request_path, "rb") as f:
+            batch_file = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        print(f"📤 Submitted batch {batch.id} ({request_path})")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            print(f"    ⏳ Batch {batch.id}: {batch.status}")
+
+        if not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} ended as {batch.status} without output")
+
+        content = self.client.files.content(batch.output_file_id)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content.text)
+        return output_path
+
+
+class LocalBatchRunner:
+    """
+    Stand-in for the Batch API: answers every line of the request file locally and
+    writes an output file in the same format. answer(body) receives the request body
+    ({"model", "input"}) and returns the output text, e.g. a fake for tests or a
+    function that calls the interactive API.
+    """
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def run(self, request_path: str, output_path: str):
+        with open(request_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    text = self.answer(request["body"])
+                    result = {
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": {"output_text": text}},
+                        "error": None,
+                    }
+                except Exception as e:
+                    result = {
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"message": str(e)},
+                    }
+                out.write(json.dumps(result) + "\n")
+        return output_path
+
+
+class LeadsBatch:
+    """
+    Offline batch mode for LeadsAgent. For each wave, every pending prompt of the run is
+    written to a JSONL request file in the OpenAI batch format, handed to a runner, and
+    the results are mapped back onto the Place objects by custom_id ("<place id>:<field>").
+    Fields that are already set are skipped, so a run can be resumed.
+    """
+
+    def __init__(self, agent, places, runner, batch_dir=DEFAULT_BATCH_DIR, run_id=None):
+        self.agent = agent
+        self.places = {place.id: place for place in places}
+        self.runner = runner
+        self.batch_dir = batch_dir
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+
+    def write_requests(self, wave_index: int):
+        """Write the request file for a wave. Returns its path and the number of requests."""
+        os.makedirs(self.batch_dir, exist_ok=True)
+        path = os.path.join(self.batch_dir, f"{self.run_id}_wave{wave_index + 1}.jsonl")
+        count = 0
+
+        with open(path, "w", encoding="utf-8") as f:
+            for place in self.places.values():
+                for field in WAVES[wave_index]:
+                    if getattr(place, field) is not None:
+                        continue
+                    try:
+                        content = _report_content(self.agent, place, field)
+                    except Exception as e:
+                        print(f"⚠️ Could not build {field} for {place.display_name}: {e}")
+                        continue
+                    if content is None:
+                        continue
+
+                    request = {
+                        "custom_id": f"{place.id}:{field}",
+                        "method": "POST",
+                        "url": BATCH_ENDPOINT,
+                        "body": {"model": MODEL, "input": [{"role": "user", "content": content}]},
+                    }
+                    f.write(json.dumps(request) + "\n")
+                    count += 1
+
+        return path, count
+
+    def ingest(self, output_path: str):
+        """Map a batch output file back onto the places. Returns the number of fields set."""
+        ingested = 0
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                place_id, field = result["custom_id"].rsplit(":", 1)
+                place = self.places.get(place_id)
+                if place is None:
+                    continue
+
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    print(f"❌ Batch request {result['custom_id']} failed: {result.get('error') or response}")
+                    continue
+
+                text = output_text(response.get("body", {}))
+                setattr(place, field, text.strip() if field == "email_subject" else text)
+                ingested += 1
+        return ingested
+
+    def mark_unreported(self, request_path: str, reason: str):
+        """Record reason as skip_reason on every place with a request in the file"""
+        with open(request_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                place_id = json.loads(line)["custom_id"].rsplit(":", 1)[0]
+                place = self.places.get(place_id)
+                if place is not None:
+                    place.skip_reason = reason
+
+    def run(self):
+        """
+        Run every wave. A wave whose batch fails leaves its places unreported (with
+        skip_reason set) and the run goes on, keeping the results of earlier waves.
+        """
+        for wave_index in range(len(WAVES)):
+            path, count = self.write_requests(wave_index)
+            if count == 0:
+                continue
+            print(f"📝 Wave {wave_index + 1}: {count} requests -> {path}")
+            output_path = path.replace(".jsonl", "_output.jsonl")
+            try:
+                self.runner.run(path, output_path)
+            except Exception as e:
+                print(f"❌ Wave {wave_index + 1} failed: {e}")
+                self.mark_unreported(path, f"Batch wave {wave_index + 1} failed: {e}")
+                continue
+            ingested = self.ingest(output_path)
+            print(f"📥 Wave {wave_index + 1}: ingested {ingested}/{count} results")
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "llm_responses")
+DEFAULT_TTL = 30 * 24 * 60 * 60         # seconds
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024   # evict least recently used entries past this
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses, keyed by a hash of the model and the full input
+    (prompt text and any base64 images). An entry's file mtime is its last use (write or
+    hit): entries unused for ttl seconds expire, and the least recently used ones are
+    evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None  # computed on first write
+
+    @staticmethod
+    def make_key(model, input):
+        payload = json.dumps({"model": model, "input": input}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached response text, or None on a miss"""
+        path = self._path(key)
+        try:
+            last_used = os.stat(path).st_mtime
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - last_used > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry.get("output_text")
+
+    def set(self, key, model, output_text):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"model": model, "output_text": output_text})
+
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                replaced = os.stat(path).st_size  # an overwrite only adds the difference
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._entries())
+            else:
+                self._size += os.path.getsize(path) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones until 90% of max_bytes"""
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        size = sum(entry[2] for entry in entries)
+        target = self.max_bytes * 0.9
+        for path, mtime, entry_size in entries:
+            # Sorted by last use, so expired entries come first
+            if size <= target and now - mtime <= self.ttl:
+                break
+            self._remove(path)
+            size -= entry_size
+        self._size = size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 2) if total else 0.0,
+            }
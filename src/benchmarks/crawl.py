@@ -0,0 +1,142 @@
+"""
+Requests per useful page of crawl_website: the old breadth-first crawl against the
+prioritized, deduplicated frontier, walking links or seeded from the sitemap. A useful
+page is a distinct, non-empty page text in the crawl's result. Requests include
+robots.txt and sitemaps.
+
+    python benchmarks/crawl.py                 # synthetic site served locally
+    python benchmarks/crawl.py --urls urls.txt # real sites, one url per line
+
+Run from src/.
+"""
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import threading
+from collections import deque
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.site_index import SiteIndex  # noqa: E402
+from parsers.website_parser import RELEVANT_KEYWORDS, WebsiteParser  # noqa: E402
+from parsers.website_snapshot import WebsiteSnapshot  # noqa: E402
+from tools import http_client  # noqa: E402
+
+NAV = (
+    '<a href="/about">About</a> <a href="/about/">About us</a> <a href="/about#team">Team</a>'
+    ' <a href="/contact?utm_source=nav">Contact</a> <a href="/services/">Services</a>'
+    ' <a href="/products/catalog.pdf">Catalog</a> <a href="/careers">Careers</a>'
+    ' <a href="https://facebook.com/shop">Facebook</a>'
+)
+
+
+def legacy_crawl(url, max_pages=5, max_char_per_page=2000):
+    """crawl_website before the frontier: FIFO queue, dedupe only after a fetch, stop at the first error"""
+    html_contents = []
+    visited = set()
+    q = deque([url])
+    domain = urlparse(url).netloc
+    snapshot = WebsiteSnapshot.for_url(url)
+
+    while q and len(html_contents) < max_pages:
+        curr_page_url = q.popleft()
+        try:
+            page = snapshot.page(curr_page_url)
+            for full_url in page.links:
+                if (
+                    domain in urlparse(full_url).netloc
+                    and full_url not in visited
+                    and any(keyword in full_url.lower() for keyword in RELEVANT_KEYWORDS)
+                ):
+                    q.append(full_url)
+            html_contents.append(page.text[:max_char_per_page])
+        except Exception:
+            return "Failed to extract HTML contents"
+        visited.add(curr_page_url)
+    return html_contents
+
+
+def write_site(root):
+    """A small business site with the usual duplicate nav links, a PDF, a dead link and a sitemap"""
+    pages = {
+        "index.html": "Welcome to the shop. We sell handmade furniture.",
+        "about/index.html": "Family business since 1982, two workshops.",
+        "contact/index.html": "Call us or visit the showroom.",
+        "services/index.html": "Custom orders, repairs and delivery.",
+        "blog/index.html": "News from the workshop.",
+    }
+    for name, text in pages.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"<html><body><nav>{NAV}</nav><p>{text}</p></body></html>")
+    os.makedirs(os.path.join(root, "products"), exist_ok=True)
+    with open(os.path.join(root, "products", "catalog.pdf"), "wb") as f:
+        f.write(b"%PDF-1.4" + b"0" * 500_000)
+
+    paths = ["/", "/about/", "/contact/", "/services/", "/blog/", "/products/catalog.pdf"]
+    with open(os.path.join(root, "sitemap.xml"), "w", encoding="utf-8") as f:
+        f.write("<urlset>" + "".join(f"<url><loc>{path}</loc></url>" for path in paths) + "</urlset>")
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(root):
+    handler = functools.partial(_QuietHandler, directory=root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def measure(crawl, urls):
+    WebsiteSnapshot.clear_cache()
+    SiteIndex.clear_cache()
+    http_client.reset_fetch_stats()
+    useful = 0
+    for url in urls:
+        result = crawl(url)
+        if isinstance(result, list):
+            useful += len({text for text in result if text.strip()})
+    stats = http_client.fetch_stats()
+    return stats["fetches"], stats["bytes"], useful
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--urls", metavar="URL_FILE", help="crawl these sites instead of the synthetic one")
+    args = arg_parser.parse_args()
+
+    server = None
+    if args.urls:
+        with open(args.urls, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+    else:
+        root = tempfile.mkdtemp(prefix="crawl_bench_")
+        write_site(root)
+        server, url = serve(root)
+        urls = [url]
+
+    try:
+        crawls = (
+            ("BFS crawl", legacy_crawl),
+            ("Link walk", functools.partial(WebsiteParser.crawl_website, use_sitemap=False)),
+            ("Sitemap", WebsiteParser.crawl_website),
+        )
+        for name, crawl in crawls:
+            requests, size, useful = measure(crawl, urls)
+            per_page = f"{requests / useful:.2f}" if useful else "-"
+            print(f"{name:10} {requests:4} requests {size / 1024:8.0f} KiB {useful:4} useful pages  {per_page} requests/useful page")
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
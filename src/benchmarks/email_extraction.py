@@ -0,0 +1,108 @@
+"""
+Micro-benchmark of email extraction: the BeautifulSoup implementation
+(website_parser.emails_from_page) against the byte scanner (parsers.email_extractor)
+over a corpus of saved pages.
+
+    python benchmarks/email_extraction.py --save urls.txt   # fetch pages into the corpus
+    python benchmarks/email_extraction.py                    # run the benchmark
+
+Run from src/.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.email_extractor import extract_emails  # noqa: E402
+from parsers.website_parser import emails_from_page, filter_emails  # noqa: E402
+from parsers.website_snapshot import WebPage  # noqa: E402
+from tools import http_client  # noqa: E402
+from tools.http_client import WEBSITE_TIMEOUT  # noqa: E402
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+
+def save_pages(url_file, corpus_dir):
+    os.makedirs(corpus_dir, exist_ok=True)
+    with open(url_file, "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    for url in urls:
+        try:
+            response = http_client.get(url, timeout=WEBSITE_TIMEOUT)
+        except Exception as e:
+            print(f"❌ {url}: {e}")
+            continue
+        name = f"{urlparse(url).netloc}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.html"
+        with open(os.path.join(corpus_dir, name), "wb") as f:
+            f.write(response.content)
+        print(f"✅ {url} ({len(response.content)} bytes)")
+
+
+def load_corpus(corpus_dir):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.htm*"))):
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def soup_extract(content):
+    return set(emails_from_page(WebPage("", content)))
+
+
+def scan_extract(content):
+    return set(filter_emails(extract_emails(content)))
+
+
+def best_time(func, pages, repeat):
+    """Best of repeat runs over the whole corpus, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, content in pages:
+            func(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="directory of saved .html pages")
+    arg_parser.add_argument("--save", metavar="URL_FILE", help="fetch the urls in URL_FILE into the corpus and exit")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.save:
+        save_pages(args.save, args.corpus)
+        return
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"No pages in {args.corpus}, save some with --save first")
+        return
+
+    total_bytes = sum(len(content) for _, content in pages)
+    print(f"📄 {len(pages)} pages, {total_bytes / 1024:.0f} KiB")
+
+    soup_time = best_time(soup_extract, pages, args.repeat)
+    scan_time = best_time(scan_extract, pages, args.repeat)
+    print(f"    BeautifulSoup: {soup_time * 1000:8.1f} ms ({soup_time / len(pages) * 1000:.2f} ms/page)")
+    print(f"    Byte scanner:  {scan_time * 1000:8.1f} ms ({scan_time / len(pages) * 1000:.2f} ms/page)")
+    print(f"    Speedup:       {soup_time / scan_time:8.1f}x")
+
+    # Where the two disagree, e.g. obfuscated addresses only the scanner decodes
+    for name, content in pages:
+        old, new = soup_extract(content), scan_extract(content)
+        if old != new:
+            print(f"    ≠ {name}: only soup {sorted(old - new)}, only scanner {sorted(new - old)}")
+
+
+if __name__ == "__main__":
+    main()
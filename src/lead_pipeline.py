@@ -0,0 +1,309 @@
+import heapq
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from parsers.site_index import SiteIndex
+from parsers.website_snapshot import WebsiteSnapshot
+from place import Place
+from tools import http_client
+from tools.lead_store import REJECT_CLOSED, REJECT_NO_EMAIL, REJECT_NO_WEBSITE
+
+# Per-stage concurrency limits
+DEFAULT_EMAIL_WORKERS = 8    # website fetches, mostly waiting on the network
+DEFAULT_SCORE_WORKERS = 2    # TextBlob scoring, CPU bound and fast
+DEFAULT_REPORT_WORKERS = 4   # OpenAI calls, the slowest stage by far
+DEFAULT_EXPORT_WORKERS = 3   # Notion writes, paced by the shared Notion rate limiter
+DEFAULT_QUEUE_SIZE = 16      # max items buffered between two stages
+DEFAULT_MAX_PENDING = 64     # max finished places held back by export to restore search order
+
+_DONE = object()
+
+
+class _Item:
+    """A place travelling through the pipeline, tagged with its search order"""
+
+    def __init__(self, seq, place):
+        self.seq = seq
+        self.place = place
+        self.dropped = False
+
+    def __lt__(self, other):
+        return self.seq < other.seq
+
+
+class LeadPipeline:
+    """
+    Staged producer/consumer engine behind PlaceParser's searches:
+
+        Places search -> emails -> scoring -> AI reports -> Notion export
+
+    Stages are connected by bounded queues and each one runs its own pool of
+    worker threads, so fast stages never wait on the LLM stage and a slow stage
+    applies backpressure instead of letting the run pile up in memory.
+
+    The export stage is driven from the calling thread (Streamlit placeholders can
+    only be updated from the script thread): places are stored and submitted to Notion
+    in search order, the Notion writes themselves run concurrently within the rate
+    limit, and on_export callbacks fire in search order. At most max_pending finished
+    places wait on a slow earlier one; past that they are exported ahead of it.
+    A failed store, export or on_export only skips that place. If the export stage
+    fails anyway, the other stages are stopped and drained so run() still returns.
+
+    With min_base_score set, places are pre-qualified on their Places payload alone
+    before any website is fetched: places without a website or whose base score is
+    below min_base_score are dropped without entering the later stages. Only the
+    missing website is remembered in the negative cache; the cutoff may change.
+    stats counts the places that reached or were stopped at each tier during the last run.
+    """
+
+    def __init__(
+        self,
+        parser,
+        email_workers=DEFAULT_EMAIL_WORKERS,
+        score_workers=DEFAULT_SCORE_WORKERS,
+        report_workers=DEFAULT_REPORT_WORKERS,
+        export_workers=DEFAULT_EXPORT_WORKERS,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        min_base_score=None,
+        max_pending=DEFAULT_MAX_PENDING,
+    ):
+        self.parser = parser
+        self.email_workers = email_workers
+        self.score_workers = score_workers
+        self.report_workers = report_workers
+        self.export_workers = export_workers
+        self.queue_size = queue_size
+        self.min_base_score = min_base_score
+        self.max_pending = max_pending
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, queries, export=False, on_export=None, generate_reports=True):
+        """
+        Run all queries through the pipeline. Places with emails are stored in
+        parser.places and, when export is set, exported to Notion as they come out.
+        on_export(place) is called on this thread after each stored place.
+        With generate_reports=False the AI report stage passes places through untouched
+        (e.g. when reports are generated afterwards in batch mode) and the website
+        snapshots of stored places are kept for that later report generation.
+        """
+        found = queue.Queue(maxsize=self.queue_size)
+        with_emails = queue.Queue(maxsize=self.queue_size)
+        scored = queue.Queue(maxsize=self.queue_size)
+        reported = queue.Queue(maxsize=self.queue_size)
+
+        # Website snapshots and sitemaps are shared by the stages of one run only
+        WebsiteSnapshot.clear_cache()
+        SiteIndex.clear_cache()
+        self.stats = Counter()
+        self._stop.clear()
+        http_client.reset_fetch_stats()
+
+        search_thread = threading.Thread(target=self._search_stage, args=(queries, found), daemon=True)
+        search_thread.start()
+        self._start_stage("email", self._email_stage, self.email_workers, found, with_emails)
+        self._start_stage("scoring", self._score_stage, self.score_workers, with_emails, scored)
+        report_stage = self._report_stage if generate_reports else (lambda item: None)
+        self._start_stage("report", report_stage, self.report_workers, scored, reported)
+
+        self._export_stage(reported, export, on_export, keep_snapshots=not generate_reports)
+        search_thread.join()
+        print(f"📊 Pipeline: {self.format_stats()}")
+        fetches = http_client.fetch_stats()
+        print(
+            f"🌐 Websites: {fetches['fetches']} fetches, {fetches['bytes'] / 1024:.0f} KiB, "
+            f"{fetches.get('truncated', 0)} truncated, {fetches.get('skipped', 0)} not HTML, "
+            f"{fetches.get('errors', 0)} failed, {fetches['avg_seconds']}s avg"
+        )
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def format_stats(self):
+        """One line summary of stats, in pipeline order"""
+        keys = (
+            "found", "known", "closed", "no_website", "below_cutoff",
+            "qualified", "unreachable", "no_email", "scored", "reported", "stored",
+        )
+        return ", ".join(f"{key}={self.stats[key]}" for key in keys if self.stats[key])
+
+    def _search_stage(self, queries, outbox):
+        claimed = set()
+        seq = 0
+        try:
+            for q in queries:
+                print(f'__Searching for {q}__')
+                for place in self.parser.iter_places(q):
+                    if self._stop.is_set():
+                        return
+                    place_id = place["id"]
+                    self._count("found")
+                    if place_id in claimed or self.parser.is_known(place_id):
+                        self._count("known")
+                        continue
+                    claimed.add(place_id)
+                    if place.get("businessStatus") == "CLOSED_PERMANENTLY":
+                        self.parser.store.reject(place_id, REJECT_CLOSED)
+                        self._count("closed")
+                        continue
+                    place = Place(place)
+                    if not self._qualifies(place):
+                        continue
+                    self._count("qualified")
+                    print(f'    FOUND: {place_id}')
+                    outbox.put(_Item(seq, place))
+                    seq += 1
+                print(f'__Done searching for {q}__')
+        except Exception as e:
+            print(f"❌ Error in search stage: {e}")
+        finally:
+            outbox.put(_DONE)
+
+    def _qualifies(self, place):
+        """Pre-qualification tier: reject on the payload alone, before any website fetch"""
+        if self.min_base_score is None:
+            return True
+        if not place.website_uri:
+            self.parser.store.reject(place.id, REJECT_NO_WEBSITE)
+            self._count("no_website")
+            return False
+        if place.base_score() < self.min_base_score:
+            # Not cached: the score is cheap to recompute and a later run may use a lower cutoff
+            self._count("below_cutoff")
+            return False
+        return True
+
+    def _email_stage(self, item):
+        if item.place.enrich_emails():
+            return
+        # eliminate places with no emails, but only remember the rejection if the site
+        # answered: a timeout or server error says nothing about its email
+        item.dropped = True
+        if item.place.website_uri and WebsiteSnapshot.for_url(item.place.website_uri).unreachable:
+            self._count("unreachable")
+            return
+        self.parser.store.reject(item.place.id, REJECT_NO_EMAIL)
+        self._count("no_email")
+
+    def _score_stage(self, item):
+        item.place.enrich_score()
+        self._count("scored")
+
+    def _report_stage(self, item):
+        item.place.enrich_reports(self.parser.agent)
+        if item.place.brief is not None:
+            self._count("reported")
+
+    def _start_stage(self, name, func, workers, inbox, outbox):
+        state = {"remaining": workers, "lock": threading.Lock()}
+        for _ in range(workers):
+            threading.Thread(
+                target=self._stage_worker,
+                args=(name, func, inbox, outbox, state, self._stop),
+                daemon=True,
+            ).start()
+
+    @staticmethod
+    def _stage_worker(name, func, inbox, outbox, state, stop):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Hand the sentinel on to sibling workers; the last one out closes the next stage
+                inbox.put(_DONE)
+                with state["lock"]:
+                    state["remaining"] -= 1
+                    last = state["remaining"] == 0
+                if last:
+                    outbox.put(_DONE)
+                return
+
+            if stop.is_set():
+                item.dropped = True  # export failed, just drain
+            if not item.dropped:
+                try:
+                    func(item)
+                except Exception as e:
+                    print(f"❌ Error in {name} stage for {item.place.display_name}: {e}")
+                    item.dropped = True
+
+            # Dropped items still flow through so the export stage can keep search order
+            outbox.put(item)
+
+    def _export_stage(self, inbox, export, on_export, keep_snapshots=False):
+        pending = []
+        next_seq = 0
+        exporting = deque()  # (place, future) in search order
+        item = None
+
+        with ThreadPoolExecutor(max_workers=self.export_workers) as executor:
+            try:
+                while True:
+                    item = inbox.get()
+                    if item is _DONE:
+                        break
+                    if item.place.website_uri and (item.dropped or not keep_snapshots):
+                        # Every stage is done with the site, free its pages and screenshot
+                        WebsiteSnapshot.evict(item.place.website_uri)
+                    if item.seq < next_seq:
+                        # Late: later places were already let past it
+                        self._store(item, executor, export, exporting)
+                    else:
+                        heapq.heappush(pending, item)
+                    if len(pending) > self.max_pending:
+                        # Stop waiting on a slow head item so the buffer stays bounded
+                        next_seq = pending[0].seq
+
+                    while pending and pending[0].seq == next_seq:
+                        self._store(heapq.heappop(pending), executor, export, exporting)
+                        next_seq += 1
+
+                    self._finish_exports(exporting, on_export)
+
+                self._finish_exports(exporting, on_export, wait=True)
+            except BaseException:
+                # Let upstream workers blocked on full queues finish, then give up
+                self._stop.set()
+                while item is not _DONE:
+                    item = inbox.get()
+                raise
+
+    def _store(self, item, executor, export, exporting):
+        if item.dropped:
+            return
+        place = item.place
+        try:
+            self.parser.places[place.id] = place
+            self.parser.store.save_place(place)
+        except Exception as e:
+            print(f"❌ Error storing {place.display_name}: {e}")
+            return
+        self._count("stored")
+        future = executor.submit(self._export, place) if export else None
+        exporting.append((place, future))
+
+    def _export(self, place):
+        try:
+            if self.parser.notion.export_place(place=place):
+                self.parser.store.mark_exported(place.id)
+        except Exception as e:
+            print(f"❌ Error exporting {place.display_name}: {e}")
+
+    @staticmethod
+    def _finish_exports(exporting, on_export, wait=False):
+        """Fire on_export for finished exports, stopping at the first one still running"""
+        while exporting:
+            place, future = exporting[0]
+            if future is not None and not (wait or future.done()):
+                return
+            if future is not None:
+                future.result()
+            exporting.popleft()
+            if on_export:
+                try:
+                    on_export(place)
+                except Exception as e:
+                    print(f"❌ Error in on_export for {place.display_name}: {e}")
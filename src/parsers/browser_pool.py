@@ -0,0 +1,208 @@
+import asyncio
+import atexit
+import threading
+
+from playwright.async_api import async_playwright
+
+from tools.images import DEFAULT_MAX_HEIGHT
+
+DEFAULT_POOL_SIZE = 3             # pages that can render at the same time
+DEFAULT_CAPTURE_TIMEOUT = 15000   # ms, per navigation / screenshot
+MAX_USES_PER_CONTEXT = 25         # recycle contexts before they leak too much memory
+DEFAULT_VIEWPORT = {"width": 1280, "height": 800}
+
+
+class Capture:
+    """What one navigation produced: the screenshot and the DOM after scripts ran"""
+
+    def __init__(self, url, screenshot, html=None):
+        self.url = url
+        self.screenshot = screenshot  # PNG bytes
+        self.html = html              # None unless the DOM was requested
+
+
+class _Slot:
+    """A reusable browser context with a single page"""
+
+    def __init__(self, context, page, generation):
+        self.context = context
+        self.page = page
+        self.generation = generation  # pool settings the context was created with
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Long-lived headless Chromium shared by the whole process.
+
+    Playwright runs on a dedicated thread with its own asyncio loop, so any thread
+    (pipeline workers, the Streamlit script thread, which already has a loop of its
+    own) can submit captures without spawning a new interpreter or browser.
+    Contexts are handed out from a pool, recycled after MAX_USES_PER_CONTEXT uses or
+    after any failed capture, and the browser is relaunched if it crashes.
+    Pages render in a viewport-sized window; full page captures are cut off at
+    max_height pixels, full_page=False captures only the viewport (above the fold).
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+    _options = {}
+
+    @classmethod
+    def get(cls):
+        """Return the shared pool, starting it on first use"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(**cls._options)
+                    atexit.register(cls._instance.close)
+        return cls._instance
+
+    @classmethod
+    def configure(cls, viewport=DEFAULT_VIEWPORT, max_height=DEFAULT_MAX_HEIGHT):
+        """
+        Set the viewport and max capture height of the shared pool. If it is already
+        running, the new settings apply to the next capture of each context.
+        """
+        with cls._instance_lock:
+            cls._options = {"viewport": viewport, "max_height": max_height}
+            if cls._instance is not None:
+                cls._instance.viewport = viewport
+                cls._instance.max_height = max_height
+                cls._instance._generation += 1
+
+    def __init__(
+        self,
+        size=DEFAULT_POOL_SIZE,
+        max_uses=MAX_USES_PER_CONTEXT,
+        viewport=DEFAULT_VIEWPORT,
+        max_height=DEFAULT_MAX_HEIGHT,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.viewport = viewport
+        self.max_height = max_height
+        self._generation = 0
+        self._playwright = None
+        self._browser = None
+        self._idle = None
+        self._launch_lock = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._run(self._start())
+
+    def _run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        self._launch_lock = asyncio.Lock()
+        self._idle = asyncio.Queue()
+        # Slots are created lazily; None means "needs a fresh context"
+        for _ in range(self.size):
+            self._idle.put_nowait(None)
+
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._browser is not None:
+                    print("⚠️ Browser disconnected, relaunching")
+                self._browser = await self._playwright.chromium.launch(headless=True)
+        return self._browser
+
+    async def _new_slot(self):
+        browser = await self._ensure_browser()
+        generation = self._generation
+        context = await browser.new_context(viewport=self.viewport)
+        page = await context.new_page()
+        return _Slot(context, page, generation)
+
+    @staticmethod
+    async def _close_slot(slot):
+        if slot is None:
+            return
+        try:
+            await slot.context.close()
+        except Exception:
+            pass  # context already gone with a crashed browser
+
+    async def _capture(self, url, full_page, timeout, with_dom=False):
+        slot = await self._idle.get()
+        healthy = False
+        try:
+            if (
+                slot is None
+                or slot.page.is_closed()
+                or not self._browser.is_connected()
+                or slot.generation != self._generation
+            ):
+                await self._close_slot(slot)
+                slot = await self._new_slot()
+
+            await asyncio.wait_for(
+                slot.page.goto(url, timeout=timeout),
+                timeout=timeout / 1000 + 1,
+            )
+            clip = None
+            if full_page and self.max_height:
+                height = await slot.page.evaluate("() => document.documentElement.scrollHeight")
+                if height > self.max_height:
+                    clip = {"x": 0, "y": 0, "width": self.viewport["width"], "height": self.max_height}
+            image = await asyncio.wait_for(
+                slot.page.screenshot(full_page=full_page, clip=clip, timeout=timeout),
+                timeout=timeout / 1000 + 1,
+            )
+            html = await asyncio.wait_for(slot.page.content(), timeout=timeout / 1000 + 1) if with_dom else None
+            healthy = True
+            return Capture(slot.page.url, image, html)
+        finally:
+            if slot is not None:
+                slot.uses += 1
+                if not healthy or slot.uses >= self.max_uses:
+                    await self._close_slot(slot)
+                    slot = None
+            self._idle.put_nowait(slot)
+
+    async def _capture_many(self, urls, full_page, timeout):
+        return await asyncio.gather(
+            *(self._capture(url, full_page, timeout) for url in urls),
+            return_exceptions=True,
+        )
+
+    def capture(self, url, full_page=True, timeout=DEFAULT_CAPTURE_TIMEOUT):
+        """
+        Render url once and return a Capture with both the screenshot and the rendered
+        HTML. Blocks the calling thread only.
+        """
+        return self._run(self._capture(url, full_page, timeout, with_dom=True))
+
+    def screenshot(self, url, full_page=True, timeout=DEFAULT_CAPTURE_TIMEOUT):
+        """Render url and return the PNG bytes. Blocks the calling thread only."""
+        return self._run(self._capture(url, full_page, timeout)).screenshot
+
+    def screenshot_many(self, urls, full_page=True, timeout=DEFAULT_CAPTURE_TIMEOUT):
+        """
+        Render several urls concurrently, up to the pool size.
+        Returns PNG bytes or the raised exception for each url, in order.
+        """
+        captures = self._run(self._capture_many(list(urls), full_page, timeout))
+        return [capture if isinstance(capture, BaseException) else capture.screenshot for capture in captures]
+
+    async def _shutdown(self):
+        while not self._idle.empty():
+            await self._close_slot(self._idle.get_nowait())
+        if self._browser is not None:
+            await self._browser.close()
+        await self._playwright.stop()
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        try:
+            self._run(self._shutdown(), timeout=10)
+        except Exception as e:
+            print(f"⚠️ Error closing browser pool: {e}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,114 @@
+import heapq
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query parameters that never change the page
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref", "_ga"}
+# Links to files that aren't pages, skipped without a request
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".zip",
+    ".mp3", ".mp4", ".mov", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    ".css", ".js", ".xml", ".json",
+)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+DEFAULT_MAX_REQUESTS = 10
+DEFAULT_MAX_BYTES = 3 * 1024 * 1024
+
+
+def normalize_url(url):
+    """
+    Canonical form of a url for dedupe, as a scheme-relative url: the site_host (no
+    "www."), no default port, fragment or tracking parameters, sorted query, and no
+    trailing slash. http://www.ex.com/about/ and https://ex.com/about give the same key.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = site_host(url)
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+
+    path = parsed.path.rstrip("/") or "/"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    ]
+    return urlunparse(("", host, path, "", urlencode(sorted(query)), ""))
+
+
+def site_host(url):
+    """Host without "www.", so www.example.com and example.com count as one site"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class CrawlFrontier:
+    """
+    Urls waiting to be crawled on one site. Urls are normalized and deduplicated when
+    they are added, only same-site links matching a keyword are kept, and pop() returns
+    the most relevant one first (earliest keyword in keywords, then shallowest, then
+    first found). Also tracks the crawl's request and byte budgets.
+    """
+
+    def __init__(self, root_url, keywords, max_requests=DEFAULT_MAX_REQUESTS, max_bytes=DEFAULT_MAX_BYTES):
+        self.host = site_host(root_url)
+        self.keywords = keywords
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.requests = 0
+        self.bytes = 0
+        self.failures = 0
+        self._seen = set()
+        self._heap = []
+        self._count = 0
+        self.add(root_url, depth=0, priority=-1)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _priority(self, url):
+        path = urlparse(url).path.lower()
+        for index, keyword in enumerate(self.keywords):
+            if keyword in path:
+                return index
+        return None
+
+    def add(self, url, depth, priority=None):
+        """Queue url unless it was seen before, is off-site, isn't a page or isn't relevant"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or site_host(url) != self.host:
+            return False
+        if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+            return False
+
+        # Deduped on the normalized url, fetched as linked (minus the fragment) to avoid redirects
+        key = normalize_url(url)
+        if key in self._seen:
+            return False
+        if priority is None:
+            priority = self._priority(key)
+            if priority is None:
+                return False
+
+        self._seen.add(key)
+        url = url.split("#")[0]
+        heapq.heappush(self._heap, (priority, depth, self._count, url))
+        self._count += 1
+        return True
+
+    def pop(self):
+        """(url, depth) of the most relevant queued url"""
+        _, depth, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def record(self, size=0, failed=False):
+        """Count one request against the budgets"""
+        self.requests += 1
+        self.bytes += size
+        if failed:
+            self.failures += 1
+
+    @property
+    def exhausted(self):
+        return self.requests >= self.max_requests or self.bytes >= self.max_bytes
@@ -0,0 +1,107 @@
+import html
+import re
+from urllib.parse import unquote
+
+from bs4 import BeautifulSoup
+
+# Fast email extraction straight from the downloaded bytes. Patterns are compiled once
+# and run over the raw page minus its script, style and comment blocks; a BeautifulSoup
+# parse is only done when the cheap scan sees an "@" but can't make an address out of
+# it and the markup has an unclosed tag that could have hidden one.
+
+MAILTO_REGEX = re.compile(rb"""mailto:([^"'<>\s]+)""", re.IGNORECASE)
+# Blocks get_text() leaves out, then every remaining tag. A "<" that doesn't open a
+# tag ("a < b") is left in the text.
+HIDDEN_BLOCK_REGEX = re.compile(rb"<(script|style)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+TAG_REGEX = re.compile(rb"<[a-zA-Z/!?][^>]*>")
+
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+# "jane [at] example [dot] com", "jane(at)example.com", "jane {at} example dot co dot uk".
+# Dots are a [dot]-style marker, " dot ", or a literal "." with no space around it, and
+# the address must end in an alphabetic TLD, so "specials (at) noon. Dinner",
+# "start (at) 19.99" or "us (at) instagram.com/bakery" aren't read as addresses.
+OBFUSCATED_DOT = r"(?:\s*[\[({]\s*dot\s*[\])}]\s*|\s+dot\s+|\.)"
+OBFUSCATED_EMAIL_REGEX = re.compile(
+    r"(?<![\w.%+-])([a-zA-Z0-9._%+-]+)\s*[\[({]\s*at\s*[\])}]\s*"
+    rf"((?:[a-zA-Z0-9-]+{OBFUSCATED_DOT})+[a-zA-Z]{{2,}})(?![\w/@-]|\.\w)",
+    re.IGNORECASE,
+)
+OBFUSCATED_DOT_REGEX = re.compile(OBFUSCATED_DOT, re.IGNORECASE)
+OBFUSCATED_AT_REGEX = re.compile(r"[\[({]\s*at\s*[\])}]", re.IGNORECASE)  # cheap pre-check
+# Something that opens like a tag but runs into the next "<" ("a <b and jane@x.com</p>"):
+# TAG_REGEX swallows the text in between
+UNCLOSED_TAG_REGEX = re.compile(rb"<[a-zA-Z/!?][^<>]*<")
+
+STRIP_CHARS = " ,;:.()[]<>\"'"
+
+
+def _decode(raw: bytes) -> str:
+    text = raw.decode("utf-8", errors="replace")
+    if "&" in text:
+        text = html.unescape(text)
+    return text
+
+
+def mailto_emails(content: bytes):
+    """Addresses of mailto: links, percent and entity decoded"""
+    emails = set()
+    for match in MAILTO_REGEX.finditer(content):
+        target = unquote(_decode(match.group(1))).split("?")[0]
+        for email in target.split(","):
+            email = email.strip(STRIP_CHARS)
+            if email:
+                emails.add(email)
+    return emails
+
+
+def visible_markup(content: bytes) -> bytes:
+    """The page without its script, style and comment blocks"""
+    return HIDDEN_BLOCK_REGEX.sub(b" ", content)
+
+
+def page_text(content: bytes, visible=False) -> str:
+    """Visible text of a page, roughly what soup.get_text(" ") returns"""
+    if not visible:
+        content = visible_markup(content)
+    return _decode(TAG_REGEX.sub(b" ", content))
+
+
+def text_emails(text: str):
+    """Plain and obfuscated addresses in page text"""
+    emails = set()
+    # The full patterns are slow on long texts, so only run them when they can match
+    if "@" in text:
+        emails.update(email.strip(STRIP_CHARS) for email in EMAIL_REGEX.findall(text))
+    if OBFUSCATED_AT_REGEX.search(text):
+        for local, domain in OBFUSCATED_EMAIL_REGEX.findall(text):
+            emails.add(f"{local}@{OBFUSCATED_DOT_REGEX.sub('.', domain)}".strip(STRIP_CHARS))
+    return emails
+
+
+def _soup_emails(content: bytes):
+    soup = BeautifulSoup(content, "html.parser")
+    emails = set()
+    for a in soup.find_all("a", href=True):
+        if a["href"].lower().startswith("mailto:"):
+            emails.update(mailto_emails(a["href"].encode("utf-8")))
+    emails.update(text_emails(soup.get_text(" ", strip=True)))
+    return emails
+
+
+def extract_emails(content):
+    """
+    Return the set of addresses found in a page (bytes or str), from mailto links,
+    the page text and common [at]/[dot] obfuscations. Role-based filtering is left
+    to the caller.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    # Commented-out and script-built mailto: links are not on the page
+    content = visible_markup(content)
+    emails = mailto_emails(content)
+    found = text_emails(page_text(content, visible=True))
+    if not found and not emails and b"@" in content and UNCLOSED_TAG_REGEX.search(content):
+        found = _soup_emails(content)
+    emails.update(found)
+    return {email for email in emails if "@" in email}
@@ -1,116 +1,156 @@
-import random
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from openpyxl import Workbook
 
 from typing import List
 
 from agents.leads_agent import LeadsAgent
-from place import Place
+from agents.leads_batch import LeadsBatch, OpenAIBatchRunner
+from lead_pipeline import DEFAULT_EXPORT_WORKERS, DEFAULT_REPORT_WORKERS, LeadPipeline
+from parsers.website_snapshot import WebsiteSnapshot
+from tools import http_client
 from tools.keys import get_secret
+from tools.lead_store import DEFAULT_DB_PATH, LeadStore
 from tools.notion import Notion
 
-DEFAULT_FIELD_MASK = "places.id,places.displayName,places.googleMapsUri,places.types,places.websiteUri,places.nationalPhoneNumber,places.businessStatus,places.rating,places.userRatingCount,places.reviewSummary,places.reviews"
+DEFAULT_FIELD_MASK = "places.id,places.displayName,places.googleMapsUri,places.types,places.websiteUri,places.nationalPhoneNumber,places.businessStatus,places.rating,places.userRatingCount,places.reviewSummary,places.reviews,nextPageToken"
+
+# Text Search returns at most 20 places per page and 3 pages per query
+DEFAULT_MAX_PAGES = 3
+PAGE_SIZE = 20
 
 places_api_key = get_secret("GOOGLE_API_KEY")
 places_api_url = "https://places.googleapis.com/v1/places:searchText"
 
 
 class PlaceParser:
-    def __init__(self, field_mask: str = DEFAULT_FIELD_MASK):
+    def __init__(
+        self,
+        field_mask: str = DEFAULT_FIELD_MASK,
+        max_workers: int = DEFAULT_REPORT_WORKERS,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        max_results: int = None,
+        db_path: str = DEFAULT_DB_PATH,
+        min_base_score: float = None,
+    ):
         self.notion = Notion()
         self.field_mask = field_mask
+        self.max_pages = max_pages
+        self.max_results = max_results
         self.places = {}
         self.agent = LeadsAgent()
-        self.visited = self.notion.fetch_all_place_ids()
+        # Local store is the source of truth for dedupe; Notion ids are merged into it incrementally
+        self.store = LeadStore(db_path)
+        self.store.sync_from_notion(self.notion)
+        # max_workers bounds the slowest stage (AI reports); see LeadPipeline for the others.
+        # min_base_score turns on pre-qualification: places scoring lower on their payload
+        # alone are rejected before their website is fetched
+        self.pipeline = LeadPipeline(self, report_workers=max_workers, min_base_score=min_base_score)
+
+    def is_known(self, place_id: str) -> bool:
+        """
+        True if the place was already found in this run, stored locally, exported to Notion,
+        or recently rejected (negative cache). Stored places that aren't in Notion yet are
+        exported by sync_to_notion after each export instead of being searched again.
+        """
+        return (
+            place_id in self.places
+            or place_id in self.store
+            or self.store.rejection_reason(place_id) is not None
+        )
 
-    def search(self, search_query: str):
+    def iter_places(self, search_query: str, max_pages: int = None, max_results: int = None):
         """
-        Sends request to maps api,
-        if place not in places dict then add to list
+        Sends requests to maps api following nextPageToken and yields the raw
+        place payloads as each page arrives, so consumers can start on page 1
+        before page 2 is requested. Stops after max_pages pages or max_results places.
         """
+        max_pages = max_pages or self.max_pages
+        max_results = max_results or self.max_results
+
+        field_mask = self.field_mask
+        if "nextPageToken" not in field_mask.split(","):
+            field_mask += ",nextPageToken"  # without it the API never returns a token
 
         headers = {
             "Content-Type": "application/json",
             "X-Goog-Api-Key": places_api_key,
-            "X-Goog-fieldMask": self.field_mask,
+            "X-Goog-fieldMask": field_mask,
         }
 
-        body = {"textQuery": search_query}
+        body = {"textQuery": search_query, "pageSize": PAGE_SIZE}
+        yielded = 0
+
+        for page in range(max_pages):
+            response = http_client.post(places_api_url, headers=headers, json=body)
 
-        response = requests.post(places_api_url, headers=headers, json=body)
+            if response.status_code != 200:
+                print("Error:", response.status_code, response.text)
+                return
 
-        if response.status_code == 200:
             data = response.json()
-            results = data.get("places", [])
-            for place in results:
-                if place["id"] not in self.places and place["id"] not in self.visited:
-                    print(f'    FOUND: {place["id"]}')
-                    p = Place(place=place, leads_agent=self.agent)
-                    if len(p.emails) > 0: # eliminate places with no emails
-                        self.places[place["id"]] = p
-        else:
-            print("Error:", response.status_code, response.text)
+            for place in data.get("places", []):
+                if max_results and yielded >= max_results:
+                    return
+                yield place
+                yielded += 1
+
+            next_page_token = data.get("nextPageToken")
+            if not next_page_token:
+                return
+            print(f'    ⏭️  Fetching page {page + 2} for {search_query}')
+            body["pageToken"] = next_page_token
+
+    def search(self, search_query: str):
+        """
+        Sends request to maps api,
+        if place not in places dict then add to list
+        """
+        self.pipeline.run([search_query])
 
     def search_and_export(self, search_query: str, status_placeholder=None, table_placeholder=None):
         """
         Sends request to maps api and exports each place to Notion immediately.
         Provides real-time progress updates to Streamlit UI.
         """
-        headers = {
-            "Content-Type": "application/json",
-            "X-Goog-Api-Key": places_api_key,
-            "X-Goog-fieldMask": self.field_mask,
-        }
-
-        body = {"textQuery": search_query}
-
-        response = requests.post(places_api_url, headers=headers, json=body)
-
-        if response.status_code == 200:
-            data = response.json()
-            results = data.get("places", [])
-            total_results = len(results)
-            
-            for idx, place in enumerate(results):
-                if place["id"] not in self.places and place["id"] not in self.visited:
-                    print(f'    FOUND: {place["id"]}')
-                    p = Place(place=place, leads_agent=self.agent)
-                    
-                    if len(p.emails) > 0:  # eliminate places with no emails
-                        self.places[place["id"]] = p
-                        
-                        # Export to Notion immediately
-                        try:
-                            self.notion.export_place(place=p)
-                            
-                            # Update table with live results
-                            if table_placeholder:
-                                table_data = []
-                                for stored_place in self.places.values():
-                                    table_data.append({
-                                        "Business": stored_place.display_name,
-                                        "Lead Score": f"{stored_place.lead_score}/5.00",
-                                        "Rating": f"{stored_place.rating} ⭐" if stored_place.rating else "N/A",
-                                        "Phone": stored_place.national_phone_number or "N/A",
-                                        "Emails": ", ".join(stored_place.emails[:2]) if stored_place.emails else "N/A",
-                                        "Website": "✅" if stored_place.website_uri else "❌",
-                                        "Status": "✅ Exported"
-                                    })
-                                table_placeholder.dataframe(table_data, use_container_width=True)
-                            
-                            # Add random delay to avoid rate limiting
-                            time.sleep(random.uniform(0.4, 0.6))
-                        except Exception as e:
-                            print(f"❌ Error exporting {p.display_name}: {e}")
-        else:
-            print("Error:", response.status_code, response.text)
-
-    def mass_search(self, queries: List[str]):
-        for q in queries:
-            print(f'__Searching for {q}__')
-            self.search(q)
-            print(f'__Done searching for {q}__')
+        def update_table(_place):
+            # Update table with live results
+            if table_placeholder:
+                table_data = []
+                for stored_place in self.places.values():
+                    table_data.append({
+                        "Business": stored_place.display_name,
+                        "Lead Score": f"{stored_place.lead_score}/5.00",
+                        "Rating": f"{stored_place.rating} ⭐" if stored_place.rating else "N/A",
+                        "Phone": stored_place.national_phone_number or "N/A",
+                        "Emails": ", ".join(stored_place.emails[:2]) if stored_place.emails else "N/A",
+                        "Website": "✅" if stored_place.website_uri else "❌",
+                        "Status": "✅ Exported"
+                    })
+                table_placeholder.dataframe(table_data, use_container_width=True)
+
+        self.pipeline.run([search_query], export=True, on_export=update_table)
+        # Stored places whose export failed in an earlier run are skipped by is_known, retry them
+        self.sync_to_notion()
+
+    def mass_search(self, queries: List[str], batch_reports: bool = False):
+        """
+        Search all queries. With batch_reports the AI reports are not generated inline
+        but afterwards through the OpenAI Batch API (cheaper, but can take hours).
+        """
+        self.pipeline.run(queries, generate_reports=not batch_reports)
+        if batch_reports:
+            self.generate_reports_in_batch()
+
+    def generate_reports_in_batch(self, runner=None):
+        """Generate AI reports for all qualifying places in offline batch waves"""
+        places = [place for place in self.places.values() if place.wants_reports()]
+        print(f"🧾 Generating reports for {len(places)} places in batch mode")
+        runner = runner or OpenAIBatchRunner(self.agent.base_model)
+        LeadsBatch(self.agent, places, runner).run()
+        for place in places:
+            self.store.save_place(place)
+        # Kept by the pipeline for the batch prompts (crawl, screenshot), no longer needed
+        WebsiteSnapshot.clear_cache()
 
     def export_excel(self, filename: str = "places.xlsx"):
         wb = Workbook()
@@ -170,11 +210,28 @@ class PlaceParser:
         # Save to file
         wb.save(filename)
 
+    def _export_and_mark(self, place):
+        if self.notion.export_place(place=place):
+            self.store.mark_exported(place.id)
+
     def update_notion_with_places(self):
         """Legacy batch export method - kept for backward compatibility"""
-        for place in self.places.values():
-            self.notion.export_place(place=place)
-            time.sleep(random.uniform(0.4, 0.6))
+        # Pacing is done by the Notion rate limiter, so exports can overlap
+        with ThreadPoolExecutor(max_workers=DEFAULT_EXPORT_WORKERS) as executor:
+            list(executor.map(self._export_and_mark, self.places.values()))
+        self.sync_to_notion()
+
+    def sync_to_notion(self):
+        """
+        Export every stored place that isn't in Notion yet, e.g. after a crashed or offline
+        run or a failed export. Places of this run are left to the run's own export.
+        """
+        places = [place for place in self.store.load_places() if place.id not in self.places]
+        if not places:
+            return
+        print(f"🔄 Syncing {len(places)} stored places to Notion")
+        with ThreadPoolExecutor(max_workers=DEFAULT_EXPORT_WORKERS) as executor:
+            list(executor.map(self._export_and_mark, places))
 
 
 if __name__ == "__main__":
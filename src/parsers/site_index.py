@@ -0,0 +1,131 @@
+import re
+import threading
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from parsers.crawl_frontier import SKIPPED_EXTENSIONS, normalize_url, site_host
+from tools import http_client
+
+DEFAULT_SITEMAP_PATH = "/sitemap.xml"  # where sitemap plugins put it (or redirect from)
+MAX_SITEMAPS = 4          # sitemap files read per site, index included
+MAX_SITEMAP_URLS = 5000   # page urls kept per site
+XML_CONTENT_TYPES = ("application/xml", "text/xml", "text/plain", "application/octet-stream")
+
+LOC_REGEX = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+SITEMAP_INDEX_REGEX = re.compile(r"<sitemapindex\b", re.IGNORECASE)
+# Child sitemaps of an index that usually hold pages rather than posts or products
+PAGE_SITEMAP_HINTS = ("page", "main", "static")
+
+
+class SiteIndex:
+    """
+    What a site says about itself: the rules in robots.txt and the page urls listed in
+    its sitemaps (from the robots.txt Sitemap: lines, else /sitemap.xml). Read once per
+    site and cached, so briefs can fetch the relevant pages directly instead of
+    crawling for them. Call clear_cache() between runs.
+    """
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.origin = f"{parsed.scheme}://{parsed.netloc}"
+        self.host = site_host(url)
+        self.robots = None
+        self.urls = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_url(cls, url):
+        parsed = urlparse(url)
+        key = f"{parsed.scheme}://{parsed.netloc.lower()}"
+        with cls._cache_lock:
+            index = cls._cache.get(key)
+            if index is None:
+                index = cls._cache[key] = cls(url)
+        index.load()
+        return index
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @staticmethod
+    def _fetch_text(url):
+        """Body of url as text, or None if it's missing or fails"""
+        try:
+            fetched = http_client.fetch_page(url, content_types=XML_CONTENT_TYPES)
+        except Exception:
+            return None
+        if fetched.status_code >= 400:
+            return None
+        return fetched.content.decode(fetched.encoding or "utf-8", errors="replace")
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            sitemaps = []
+            robots_txt = self._fetch_text(f"{self.origin}/robots.txt")
+            if robots_txt is not None:
+                self.robots = RobotFileParser()
+                self.robots.parse(robots_txt.splitlines())
+                sitemaps = list(self.robots.site_maps() or [])
+            if not sitemaps:
+                sitemaps = [f"{self.origin}{DEFAULT_SITEMAP_PATH}"]
+            self.urls = self._read_sitemaps(sitemaps)
+
+    def _read_sitemaps(self, sitemaps):
+        urls = []
+        seen = set()
+        pending = list(sitemaps)
+        reads = 0
+        while pending and reads < MAX_SITEMAPS and len(urls) < MAX_SITEMAP_URLS:
+            sitemap_url = pending.pop(0)
+            reads += 1
+            xml = self._fetch_text(sitemap_url)
+            if not xml:
+                continue
+            locs = [urljoin(sitemap_url, loc.replace("&amp;", "&")) for loc in LOC_REGEX.findall(xml)]
+            if not locs:
+                continue  # e.g. an HTML "not found" page served with status 200
+
+            if SITEMAP_INDEX_REGEX.search(xml):
+                # Read the children most likely to list pages first
+                locs.sort(key=lambda loc: not any(hint in loc.lower() for hint in PAGE_SITEMAP_HINTS))
+                pending = locs + pending
+                continue
+
+            for loc in locs:
+                if site_host(loc) != self.host or urlparse(loc).path.lower().endswith(SKIPPED_EXTENSIONS):
+                    continue
+                normalized = normalize_url(loc)
+                if normalized not in seen:
+                    seen.add(normalized)
+                    urls.append(loc)
+        return urls[:MAX_SITEMAP_URLS]
+
+    def allowed(self, url):
+        return self.robots is None or self.robots.can_fetch("*", url)
+
+    def relevant_urls(self, keywords, limit):
+        """
+        Up to limit sitemap urls matching keywords, one per keyword, best first: earliest
+        keyword, then the shallowest and shortest path (/about over /blog/about-our-new-x).
+        Disallowed by robots.txt urls are left out.
+        """
+        best = {}
+        for url in self.urls:
+            path = urlparse(url).path.lower()
+            keyword_index = next((i for i, keyword in enumerate(keywords) if keyword in path), None)
+            if keyword_index is None or not self.allowed(url):
+                continue
+            rank = (keyword_index, path.rstrip("/").count("/"), len(path))
+            if keyword_index not in best or rank < best[keyword_index][0]:
+                best[keyword_index] = (rank, url)
+        return [url for _, url in sorted(best.values())][:limit]
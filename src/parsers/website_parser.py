@@ -1,15 +1,14 @@
-import sys
-import requests
 import tempfile
 import os
 import re
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
-import subprocess
 
-from bs4 import BeautifulSoup
-
-from playwright.sync_api import sync_playwright
+from parsers.browser_pool import BrowserPool
+from parsers.crawl_frontier import DEFAULT_MAX_BYTES, DEFAULT_MAX_REQUESTS, CrawlFrontier, normalize_url, site_host
+from parsers.site_index import SiteIndex
+from parsers.website_snapshot import WebsiteSnapshot
+from tools.email import score_email
 
 
 EMAIL_REGEX = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
@@ -29,6 +28,33 @@ ROLE_BASED_PREFIXES = {
     "team",
 }
 
+# Subpages the crawl follows
+RELEVANT_KEYWORDS = [
+    "about",
+    "who-we-are",
+    "our-story",
+    "company",
+    "team",
+    "contact",
+    "careers",
+    "jobs",
+    "services",
+    "products",
+    "faq",
+    "help",
+    "support",
+    "blog",
+    "news",
+]
+
+# Email discovery probes the crawl's keywords most likely to list an address, in this order
+CONTACT_KEYWORDS = ["contact", "about", "team", "who-we-are", "our-story", "company", "support", "help"]
+# Probed when the homepage doesn't link a contact/about page
+CONTACT_PATHS = {"contact": ["/contact", "/contact-us"], "about": ["/about", "/about-us"]}
+MAX_REQUESTS_PER_DOMAIN = 6  # homepage included
+DISCOVERY_WORKERS = 3
+GOOD_EMAIL_SCORE = 4         # score_email of e.g. jane.doe@business.com; stop probing once found
+
 
 def filter_emails(emails):
     output_emails = []
@@ -40,87 +66,205 @@ def filter_emails(emails):
     return output_emails
 
 
-class WebsiteParser:
-    def extract_emails(url):
-        try:
-            response = requests.get(url, timeout=5)
-            soup = BeautifulSoup(response.text, "html.parser")
+def emails_from_page(page):
+    """
+    Reference implementation on a full BeautifulSoup parse, kept for comparison
+    (see benchmarks/email_extraction.py); extract_emails uses parsers.email_extractor.
+    """
+    emails = set()
+
+    # 1. mailto links
+    for a in page.soup.find_all("a", href=True):
+        if a["href"].lower().startswith("mailto:"):
+            email = a["href"].replace("mailto:", "").split("?")[0]
+            email = email.strip(" ,;:.()[]<>\"'")
+            emails.add(email)
+
+    # 2. regex fallback
+    text = page.soup.get_text(" ", strip=True)
+    found = re.findall(EMAIL_REGEX, text)
+    cleaned = [e.strip(" ,;:.()[]") for e in found if "@" in e]
+    emails.update(cleaned)
 
-            emails = set()
+    emails = filter_emails(emails)
 
-            # 1. mailto links
-            for a in soup.find_all("a", href=True):
-                if a["href"].lower().startswith("mailto:"):
-                    email = a["href"].replace("mailto:", "").split("?")[0]
-                    email = email.strip(" ,;:.()[]<>\"'")
-                    emails.add(email)
+    return list(set(emails))
 
-            # 2. regex fallback
-            text = soup.get_text(" ", strip=True)
-            found = re.findall(EMAIL_REGEX, text)
-            cleaned = [e.strip(" ,;:.()[]") for e in found if "@" in e]
-            emails.update(cleaned)
 
-            emails = filter_emails(emails)
+def contact_page_candidates(url, home=None):
+    """
+    Same-site urls likeliest to list an email, best first: linked contact/about pages,
+    then guesses. www and bare hosts count as one site, and so does the host the
+    homepage redirected to.
+    """
+    hosts = {site_host(url)}
+    if home is not None and home.url:
+        hosts.add(site_host(home.url))
+    seen = {normalize_url(url)}
+    ranked = []
+    for link in home.links if home else []:
+        link = link.split("#")[0]
+        parsed = urlparse(link)
+        if parsed.scheme not in ("http", "https") or site_host(link) not in hosts or normalize_url(link) in seen:
+            continue
+        path = parsed.path.lower()
+        rank = next((i for i, keyword in enumerate(CONTACT_KEYWORDS) if keyword in path), None)
+        if rank is not None:
+            seen.add(normalize_url(link))
+            ranked.append((rank, link))
+    ranked.sort(key=lambda candidate: candidate[0])  # stable, so page order is kept per keyword
+
+    candidates = [link for _, link in ranked]
+    for keyword, paths in CONTACT_PATHS.items():
+        if not any(keyword in urlparse(link).path.lower() for link in candidates):
+            candidates += [guess for guess in (urljoin(url, path) for path in paths) if normalize_url(guess) not in seen]
+    return candidates
 
-            return list(set(emails))
+
+def _has_good_email(emails, good_score):
+    return any(score_email(email) >= good_score for email in emails)
+
+
+class WebsiteParser:
+    def extract_emails(url):
+        """Emails on the given page only"""
+        try:
+            return list(set(filter_emails(WebsiteSnapshot.for_url(url).home.emails)))
 
         except Exception:
             return []
 
-    def crawl_website(url: str, max_pages=5, max_char_per_page = 2000):
-        relevant_keywords = [
-            "about",
-            "who-we-are",
-            "our-story",
-            "company",
-            "team",
-            "contact",
-            "careers",
-            "jobs",
-            "services",
-            "products",
-            "faq",
-            "help",
-            "support",
-            "blog",
-            "news",
-        ]
-        html_contents = []
-        visited = set()
-        q = deque([url])
-        domain = urlparse(url).netloc
+    def discover_emails(
+        url,
+        max_requests=MAX_REQUESTS_PER_DOMAIN,
+        good_score=GOOD_EMAIL_SCORE,
+        workers=DISCOVERY_WORKERS,
+    ):
+        """
+        Emails of the homepage and, unless it already has an address scoring good_score,
+        of its likeliest contact/about pages. Those are probed concurrently and probing
+        stops at the first good address or after max_requests fetches for the site.
+        Best addresses first.
+        """
+        try:
+            snapshot = WebsiteSnapshot.for_url(url)
+            if snapshot.emails is not None:
+                return list(snapshot.emails)
+            home = snapshot.home
+        except Exception:
+            return []
 
-        while q and len(html_contents) < max_pages:
-            curr_page_url = q.popleft()
+        if home.is_script_shell:
+            # Addresses and links only exist in the rendered DOM. The same browser visit
+            # later provides the screenshot for the UI report.
             try:
-                response = requests.get(curr_page_url, timeout=5)
-                soup = BeautifulSoup(response.text, "html.parser")
+                home = snapshot.render()
+            except Exception:
+                pass
 
-                for a_tag in soup.find_all("a", href=True):
-                    full_url = urljoin(curr_page_url, a_tag["href"])
-                    same_domain = domain in urlparse(full_url).netloc
-                    page_not_visited = full_url not in visited
-                    relevant_page = any(
-                        keyword in full_url.lower() for keyword in relevant_keywords
-                    )
-                    if same_domain and page_not_visited and relevant_page:
-                        q.append(full_url)
+        emails = set(filter_emails(home.emails))
+        if not _has_good_email(emails, good_score):
+            candidates = contact_page_candidates(url, home)[:max(max_requests - 1, 0)]
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = [executor.submit(snapshot.page, candidate) for candidate in candidates]
+            try:
+                for future in as_completed(futures):
+                    try:
+                        emails.update(filter_emails(future.result().emails))
+                    except Exception:
+                        continue
+                    if _has_good_email(emails, good_score):
+                        break
+            finally:
+                # Probes not started yet are dropped; running ones finish in the background
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        snapshot.emails = sorted(emails, key=lambda email: (-score_email(email), email))
+        return list(snapshot.emails)
 
-                html_contents.append(soup.text[:max_char_per_page])
+    def crawl_website(
+        url: str,
+        max_pages=5,
+        max_char_per_page=2000,
+        max_requests=DEFAULT_MAX_REQUESTS,
+        max_bytes=DEFAULT_MAX_BYTES,
+        use_sitemap=True,
+    ):
+        """
+        Text of up to max_pages pages of the site: the given page, then the most relevant
+        subpages. These are picked from the site's sitemap when it lists any (and
+        use_sitemap is set), otherwise found by following links (see CrawlFrontier), as
+        they also are when none of the sitemap's pages could be read. Pages that fail
+        are skipped; the crawl stops once max_requests new fetches or max_bytes
+        downloaded are used up.
+        """
+        html_contents = []
+        # Pages already fetched for email extraction (or an earlier crawl) are reused
+        snapshot = WebsiteSnapshot.for_url(url)
+        frontier = CrawlFrontier(url, RELEVANT_KEYWORDS, max_requests=max_requests, max_bytes=max_bytes)
 
+        sitemap_urls = []
+        if use_sitemap:
+            try:
+                sitemap_urls = SiteIndex.for_url(url).relevant_urls(RELEVANT_KEYWORDS, limit=max_pages - 1)
             except Exception:
-                return "Failed to extract HTML contents"
+                pass
+        for sitemap_url in sitemap_urls:
+            frontier.add(sitemap_url, depth=1)
+        # The link walk is only the fallback for sites without a (relevant) sitemap
+        follow_links = not sitemap_urls
+        home = None
+        sitemap_pages = 0  # sitemap pages read successfully
+
+        while len(html_contents) < max_pages and not frontier.exhausted:
+            if not frontier:
+                if follow_links or sitemap_pages or home is None:
+                    break
+                # Every sitemap page failed (stale sitemap): walk the homepage's links instead
+                follow_links = True
+                for link in home.links:
+                    frontier.add(link, 1)
+                continue
 
-            visited.add(curr_page_url)
+            page_url, depth = frontier.pop()
+            if depth == 0:
+                page_url = snapshot.url  # the homepage as fetched, not its normalized url
+            cached = snapshot.fetched(page_url)
+            try:
+                page = snapshot.page(page_url)
+            except Exception:
+                if not cached:
+                    frontier.record(failed=True)
+                continue
+            if not cached:
+                frontier.record(len(page.content), failed=page.status_code >= 400)
+            if page.status_code >= 400:
+                continue
+            if depth == 0 and (snapshot.rendered is not None or page.is_script_shell):
+                try:
+                    page = snapshot.render()
+                except Exception:
+                    pass
+            if depth == 0:
+                home = page
+            elif not follow_links:
+                sitemap_pages += 1
+
+            if follow_links:
+                for link in page.links:
+                    frontier.add(link, depth + 1)
+
+            text = page.text[:max_char_per_page]
+            if text.strip():
+                html_contents.append(text)
+
+        if not html_contents:
+            return "Failed to extract HTML contents"
         return html_contents
 
     def extract_html_contents(url: str):
         try:
-            response = requests.get(url, timeout=5)
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            return str(soup)
+            return str(WebsiteSnapshot.for_url(url).home.soup)
 
         except Exception:
             return "Failed to extract HTML contents"
@@ -131,25 +275,19 @@ class WebsiteParser:
             screenshot_dir = os.path.join(os.getcwd(), "screenshots")
             os.makedirs(screenshot_dir, exist_ok=True)
 
-            output_file = os.path.join(screenshot_dir, "temp_screenshot.png")
-
-            # Use forward slashes for Windows compatibility in subprocess string
-            safe_output_file = output_file.replace("\\", "/")
-
-            script = f"""
-from playwright.sync_api import sync_playwright
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
-    page.goto("{url}", timeout=15000)
-    page.screenshot(path=r"{safe_output_file}", full_page={full_page})
-    browser.close()
-    """
+            # Rendered by the shared browser pool instead of a fresh interpreter + Chromium per url.
+            # Full page captures come from the site's single rendering visit, shared with
+            # email discovery and the crawl.
+            if full_page:
+                image = WebsiteSnapshot.for_url(url).render().screenshot
+            else:
+                image = BrowserPool.get().screenshot(url, full_page=False)
 
-            subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+            # Unique file per capture so concurrent enrichments don't overwrite each other
+            fd, output_file = tempfile.mkstemp(prefix="screenshot_", suffix=".png", dir=screenshot_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(image)
             return output_file
 
-        except subprocess.CalledProcessError as e:
-            return f"Failed to take screenshot (subprocess error): {e.stderr.decode('utf-8', errors='ignore')}"
         except Exception as e:
             return f"Failed to take screenshot: {e}"
@@ -0,0 +1,193 @@
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from parsers.browser_pool import BrowserPool
+from parsers.email_extractor import extract_emails, page_text
+from tools import http_client
+
+# A homepage with less visible text than this is likely rendered by scripts (Wix, Squarespace, ...)
+MIN_STATIC_WORDS = 50
+# Snapshots kept at once, least recently used evicted first. Screenshots make them large.
+MAX_CACHED_SITES = 128
+
+
+class WebPage:
+    """
+    A fetched page. The raw bytes are kept as downloaded; the HTML is decoded and
+    parsed on first use, so pages only scanned for emails are never parsed.
+    """
+
+    def __init__(self, url, content, encoding=None, status_code=200):
+        self.url = url
+        self.content = content.encode("utf-8") if isinstance(content, str) else content
+        self.encoding = encoding or "utf-8"
+        self.status_code = status_code
+
+    @cached_property
+    def html(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    @cached_property
+    def soup(self):
+        return BeautifulSoup(self.html, "html.parser")
+
+    @cached_property
+    def text(self):
+        return self.soup.text
+
+    @cached_property
+    def emails(self):
+        """Every address on the page, before role-based filtering"""
+        return extract_emails(self.content)
+
+    @cached_property
+    def is_script_shell(self):
+        """True if the HTML has scripts but hardly any text, i.e. the content only appears after scripts run"""
+        return b"<script" in self.content.lower() and len(page_text(self.content).split()) < MIN_STATIC_WORDS
+
+    @cached_property
+    def links(self):
+        return [urljoin(self.url, a["href"]) for a in self.soup.find_all("a", href=True)]
+
+
+class RenderedPage(WebPage):
+    """A page as Chromium rendered it: the DOM after scripts ran, plus its screenshot"""
+
+    def __init__(self, url, html, screenshot):
+        super().__init__(url, html)
+        self.screenshot = screenshot
+
+    @property
+    def is_script_shell(self):
+        return False
+
+
+class WebsiteSnapshot:
+    """
+    Everything fetched from one business website during a run: the homepage plus any
+    subpages the crawl visited, and the emails found on it. Email extraction, the crawl
+    and the brief prompt all read from the same snapshot, so each page is downloaded
+    and parsed once. The homepage is also rendered in the browser at most once, and that
+    single visit serves the screenshot, the rendered text and the emails in it.
+
+    Snapshots live in a per-run LRU cache of at most MAX_CACHED_SITES sites. Call
+    evict() once a site is done with and clear_cache() between runs.
+    """
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, url):
+        self.url = url
+        self.domain = urlparse(url).netloc
+        self.emails = None  # filled in by WebsiteParser.discover_emails
+        self._pages = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._url_locks = {}  # one per url, so different pages can be fetched concurrently
+        self._rendered = None
+        self._render_error = None
+        self._render_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(url):
+        parsed = urlparse(url)
+        return f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+
+    @classmethod
+    def for_url(cls, url):
+        key = cls._cache_key(url)
+        with cls._cache_lock:
+            snapshot = cls._cache.get(key)
+            if snapshot is None:
+                snapshot = cls._cache[key] = cls(url)
+                while len(cls._cache) > MAX_CACHED_SITES:
+                    cls._cache.popitem(last=False)
+            else:
+                cls._cache.move_to_end(key)
+            return snapshot
+
+    @classmethod
+    def evict(cls, url):
+        """Drop the snapshot of url, e.g. once its place is exported or rejected"""
+        with cls._cache_lock:
+            cls._cache.pop(cls._cache_key(url), None)
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @property
+    def home(self):
+        return self.page(self.url)
+
+    def page(self, url):
+        """Return the parsed page, fetching it only the first time. Failures are cached too."""
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            with self._lock:
+                if url in self._pages:
+                    return self._pages[url]
+                if url in self._errors:
+                    raise self._errors[url]
+
+            try:
+                # Streamed and size-capped; PDFs, images etc. fail here without being downloaded
+                fetched = http_client.fetch_page(url)
+                page = WebPage(url, fetched.content, fetched.encoding, fetched.status_code)
+            except Exception as e:
+                with self._lock:
+                    self._errors[url] = e
+                raise
+
+            with self._lock:
+                self._pages[url] = page
+            return page
+
+    def render(self):
+        """The homepage rendered by the shared browser, captured only the first time. Failures are cached too."""
+        with self._render_lock:
+            if self._rendered is None and self._render_error is None:
+                try:
+                    capture = BrowserPool.get().capture(self.url)
+                    self._rendered = RenderedPage(capture.url, capture.html, capture.screenshot)
+                except Exception as e:
+                    self._render_error = e
+            if self._render_error is not None:
+                raise self._render_error
+            return self._rendered
+
+    @property
+    def rendered(self):
+        """The rendered homepage if render() already ran successfully, else None"""
+        return self._rendered
+
+    @property
+    def unreachable(self):
+        """
+        True if fetching the homepage failed in a way worth retrying later: a timeout,
+        a connection error, 429 or 5xx. Does not fetch anything itself.
+        """
+        with self._lock:
+            error = self._errors.get(self.url)
+            home = self._pages.get(self.url)
+        if error is not None:
+            return not isinstance(error, http_client.ContentTypeError)
+        return home is not None and (home.status_code == 429 or home.status_code >= 500)
+
+    def fetched(self, url):
+        """True if the url was already requested, successfully or not"""
+        with self._lock:
+            return url in self._pages or url in self._errors
+
+    @property
+    def pages(self):
+        with self._lock:
+            return list(self._pages.values())
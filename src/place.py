@@ -1,18 +1,60 @@
 import math
+from concurrent.futures import ThreadPoolExecutor
 
 from agents.leads_agent import LeadsAgent
 from parsers.website_parser import WebsiteParser as wp
 from tools.email import score_email
-from tools.reviews import score_review_text, score_reviews_list
+from tools.reviews import COMPAT, score_review_text, score_reviews_list
+
 
 class Place:
+    """
+    Compact lead record built purely from a Places API payload; constructing one does
+    no I/O. Enrichment runs in explicit stages (enrich_emails -> enrich_score ->
+    enrich_reports, or enrich() for all of them) and each stage's result is memoized,
+    so calling a stage again, or re-hydrating a record from storage, does no new work.
+    """
+
     # Configurable thresholds
     MIN_SCORE_FOR_AI_REPORTS = 2.5  # Only generate AI reports if final score >= 2.5
     MIN_RATING_FOR_REPORTS = 3.5    # Skip if rating is too high (less pain points)
     MAX_RATING_FOR_REPORTS = 4.3    # Skip if rating is excellent (harder to pitch)
     MIN_REVIEW_COUNT = 5            # Need enough reviews to identify patterns
-    
-    def __init__(self, place, leads_agent=None, enable_thresholds=True):
+    REPORT_WORKERS = 2              # Max LLM calls in flight per place while generating reports
+    SENTIMENT_MODE = COMPAT         # tools.reviews mode used to score review sentiment
+    DISCOVER_CONTACT_PAGES = True   # also probe contact/about pages when looking for emails
+    REPORT_FIELDS = ("ui_report", "brief", "pain_point_report", "email_sample", "email_subject")
+
+    __slots__ = (
+        "payload",  # raw Places API payload, kept for the lead store
+        "id",
+        "types",
+        "national_phone_number",
+        "rating",
+        "google_maps_uri",
+        "website_uri",
+        "business_status",
+        "user_rating_count",
+        "display_name",
+        "reviews",
+        "review_summary",
+        # Memoized enrichment results, None until their stage has run
+        "_emails",
+        "_base_score",
+        "_review_score",
+        "lead_score",
+        "_reports_done",
+        # AI report fields
+        "ui_report",
+        "brief",
+        "pain_point_report",
+        "email_sample",
+        "email_subject",
+        "skip_reason",
+    )
+
+    def __init__(self, place):
+        self.payload = place
         self.id = place.get("id")
         self.types = place.get("types", [])
         self.national_phone_number = place.get("nationalPhoneNumber")
@@ -31,18 +73,12 @@ class Place:
                  .get("text", {})
                  .get("text")
         )
-        
-        # Step 1: Find emails first
-        self.emails = self.find_email()
-        
-        # Step 2: Calculate base score
-        self.lead_score = self.score_place()
-        print(f'        📊 Base score: {self.lead_score}/5.00')
-        
-        # Step 3: Update score with email and review quality
-        if self.emails:
-            self.update_score_with_email_and_reviews()
-            print(f'        📊 Updated score: {self.lead_score}/5.00')
+
+        self._emails = None
+        self._base_score = None
+        self._review_score = None
+        self.lead_score = None
+        self._reports_done = False
         
         # Initialize AI report fields
         self.ui_report = None
@@ -51,8 +87,64 @@ class Place:
         self.email_sample = None
         self.email_subject = None  # NEW: Add email subject field
         self.skip_reason = None
+
+    def __setstate__(self, state):
+        """Load pickles of this class as well as of the old dict-based Place"""
+        if isinstance(state, tuple):  # (dict state, slots state)
+            merged = dict(state[0] or {})
+            merged.update(state[1] or {})
+            state = merged
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+        for key, value in state.items():
+            setattr(self, "_emails" if key == "emails" else key, value)
+        if "_reports_done" not in state:
+            # Old pickles don't record it: reports that were generated are already paid for
+            self._reports_done = self.has_reports()
+
+    def has_reports(self) -> bool:
+        """True if any AI report field is set"""
+        return any(getattr(self, field) is not None for field in self.REPORT_FIELDS)
+
+    @property
+    def emails(self):
+        """Emails found by enrich_emails ([] until it has run)"""
+        return self._emails or []
+
+    @emails.setter
+    def emails(self, emails):
+        self._emails = emails
+
+    def enrich(self, leads_agent=None, enable_thresholds=True):
+        """Run every enrichment stage"""
+        self.enrich_emails()
+        self.enrich_score()
+        self.enrich_reports(leads_agent, enable_thresholds)
+        return self
+
+    def enrich_emails(self):
+        """Step 1: Find emails first"""
+        if self._emails is None:
+            self._emails = self.find_email()
+        return self._emails
+
+    def enrich_score(self):
+        """Steps 2 and 3: base score, then update it with email and review quality"""
+        if self.lead_score is not None:
+            return self.lead_score
+
+        self.lead_score = self.base_score()
+        print(f'        📊 Base score: {self.lead_score}/5.00')
         
-        # Step 4: Generate AI reports based on FINAL score and thresholds
+        if self.emails:
+            self.update_score_with_email_and_reviews()
+            print(f'        📊 Updated score: {self.lead_score}/5.00')
+        return self.lead_score
+
+    def enrich_reports(self, leads_agent, enable_thresholds=True):
+        """Step 4: Generate AI reports based on FINAL score and thresholds"""
+        if self._reports_done:
+            return
         if leads_agent and self.website_uri and self.emails:
             if enable_thresholds:
                 if self._should_generate_reports():
@@ -62,6 +154,13 @@ class Place:
             else:
                 # Always generate if thresholds disabled
                 self.generate_reports(leads_agent)
+            self._reports_done = True
+
+    def wants_reports(self, enable_thresholds=True) -> bool:
+        """True if this place should get AI reports, for callers that generate them elsewhere (batch mode)"""
+        if not (self.website_uri and self.emails):
+            return False
+        return not enable_thresholds or self._should_generate_reports()
 
     def _should_generate_reports(self) -> bool:
         """
@@ -79,41 +178,50 @@ class Place:
         return True
 
     def generate_reports(self, leads_agent):
-        """Generate all AI-powered reports for this place"""
+        """
+        Generate all AI-powered reports for this place.
+        Reports run as a dependency graph rather than one after the other:
+        UI report ∥ brief, then pain points ∥ subject (subject only needs the brief),
+        then the email sample, which needs the pain points.
+        """
         print(f'        🤖 Generating reports for {self.display_name}...')
         
         try:
-            # Generate UI report
-            print(f'          - UI Report')
-            self.ui_report = leads_agent.generate_ui_report(self.website_uri)
-            
-            # Generate business brief
-            print(f'          - Business Brief')
-            self.brief = leads_agent.generate_business_brief(self.website_uri)
-            
-            # Generate pain point report (uses reviews)
-            print(f'          - Pain Point Report')
-            self.pain_point_report = leads_agent.generate_pain_points(
-                self.brief, 
-                self.ui_report, 
-                self.reviews[:5]  # Limit to 5 reviews
-            )
-            
-            # Generate email subject (NEW)
-            print(f'          - Email Subject')
-            self.email_subject = leads_agent.generate_email_subject(
-                self.display_name,
-                self.brief
-            )
-            
-            # Generate personalized email
-            print(f'          - Email Sample')
-            self.email_sample = leads_agent.generate_personalized_email(
-                self.emails[0],
-                self.display_name,
-                self.brief,
-                self.pain_point_report
-            )
+            with ThreadPoolExecutor(max_workers=self.REPORT_WORKERS) as executor:
+                # Generate UI report and business brief in parallel, they are independent
+                print(f'          - UI Report')
+                ui_future = executor.submit(leads_agent.generate_ui_report, self.website_uri)
+                print(f'          - Business Brief')
+                brief_future = executor.submit(leads_agent.generate_business_brief, self.website_uri)
+
+                # Generate email subject (NEW) as soon as the brief is ready
+                self.brief = brief_future.result()
+                print(f'          - Email Subject')
+                subject_future = executor.submit(
+                    leads_agent.generate_email_subject,
+                    self.display_name,
+                    self.brief
+                )
+
+                # Generate pain point report (uses reviews) once the UI report is ready too
+                self.ui_report = ui_future.result()
+                print(f'          - Pain Point Report')
+                self.pain_point_report = leads_agent.generate_pain_points(
+                    self.brief, 
+                    self.ui_report, 
+                    self.reviews[:5]  # Limit to 5 reviews
+                )
+                
+                # Generate personalized email while the subject may still be running
+                print(f'          - Email Sample')
+                self.email_sample = leads_agent.generate_personalized_email(
+                    self.emails[0],
+                    self.display_name,
+                    self.brief,
+                    self.pain_point_report
+                )
+
+                self.email_subject = subject_future.result()
             
             print(f'        ✅ Reports generated successfully')
         except Exception as e:
@@ -152,7 +260,12 @@ class Place:
     
     def find_email(self):
         print(f'        🔍 Looking for {self.display_name} email')
-        emails = wp.extract_emails(self.website_uri) if self.website_uri else [] 
+        if not self.website_uri:
+            emails = []
+        elif self.DISCOVER_CONTACT_PAGES:
+            emails = wp.discover_emails(self.website_uri)
+        else:
+            emails = wp.extract_emails(self.website_uri)
         
         if emails:
             print(f'        ✉️  Email found: {emails}')
@@ -189,10 +302,22 @@ class Place:
         normalized = min(5, (raw_score / max_score) * 5)
         return round(normalized, 2)
 
+    def base_score(self):
+        """score_place, memoized. Needs only the Places payload, so it's free to compute early."""
+        if self._base_score is None:
+            self._base_score = self.score_place()
+        return self._base_score
+
+    def review_sentiment(self):
+        """Average review sentiment from 1 (negative) to 5 (positive), memoized; None without reviews"""
+        if self._review_score is None and self.reviews:
+            self._review_score, _ = score_reviews_list(self.reviews, mode=self.SENTIMENT_MODE)
+        return self._review_score
+
     def update_score_with_email_and_reviews(self, email_weight=0.3, review_weight=0.1, original_score_weight=0.6):
         """
         Updates the lead score by incorporating email quality and review sentiment.
-        This is now called automatically during __init__ before threshold checks.
+        This is called by enrich_score before threshold checks.
         """
         # Original raw score
         original_score = self.lead_score or self.score_place()
@@ -206,8 +331,7 @@ class Place:
 
         # Score reviews (first 5)
         if self.reviews:
-            avg_review_score, review_scores = score_reviews_list(self.reviews)
-            avg_review_score = 6 - avg_review_score # invert so more bad reviews better the lead
+            avg_review_score = 6 - self.review_sentiment() # invert so more bad reviews better the lead
         else:
             avg_review_score = 3  # neutral if no reviews
 
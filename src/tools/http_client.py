@@ -0,0 +1,192 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Timeouts in seconds
+API_TIMEOUT = 30       # Places, Notion
+WEBSITE_TIMEOUT = 5    # business websites, which are often slow or dead
+
+DEFAULT_POOL_SIZE = 16  # keep-alive connections kept per host
+DEFAULT_RETRIES = 2
+
+# Website downloads
+MAX_PAGE_BYTES = 1024 * 1024  # read at most this much of a page, the rest is dropped
+CHUNK_SIZE = 64 * 1024
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+_session = None
+_session_lock = threading.Lock()
+_settings = {
+    "pool_size": DEFAULT_POOL_SIZE,
+    "retries": DEFAULT_RETRIES,
+    "timeout": API_TIMEOUT,
+}
+
+_fetch_stats = {}
+_fetch_stats_lock = threading.Lock()
+
+
+class ContentTypeError(requests.RequestException):
+    """The response isn't a page we want to read, e.g. a PDF or an image"""
+
+
+class FetchedPage:
+    """Body of a streamed download plus what it cost"""
+
+    def __init__(self, url, status_code, content, encoding, truncated, elapsed):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated  # stopped at max_bytes or the time limit
+        self.elapsed = elapsed      # seconds from request to last byte read
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller doesn't pass one"""
+
+    def __init__(self, timeout, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _build_session():
+    retry = Retry(
+        total=_settings["retries"],
+        connect=_settings["retries"],
+        read=1,
+        status=0,
+        backoff_factor=0.5,
+        # Status based retries (429/5xx with Retry-After) are left to API clients that know
+        # the service's rate limits, see Notion._request
+        raise_on_status=False,
+    )
+    adapter = _TimeoutHTTPAdapter(
+        timeout=_settings["timeout"],
+        pool_connections=_settings["pool_size"],  # number of hosts with a cached pool
+        pool_maxsize=_settings["pool_size"],      # connections kept alive per host
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(pool_size=None, retries=None, timeout=None):
+    """
+    Change pool size, retry count or default timeout.
+    The shared session is rebuilt on next use.
+    """
+    global _session
+    with _session_lock:
+        if pool_size is not None:
+            _settings["pool_size"] = pool_size
+        if retries is not None:
+            _settings["retries"] = retries
+        if timeout is not None:
+            _settings["timeout"] = timeout
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_session():
+    """
+    Return the process-wide requests.Session. Connection pools are thread-safe,
+    so one session is shared by every thread to reuse keep-alive connections.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method, url, **kwargs):
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+
+def _count(outcome, size=0, elapsed=0.0):
+    with _fetch_stats_lock:
+        _fetch_stats[outcome] = _fetch_stats.get(outcome, 0) + 1
+        _fetch_stats["bytes"] = _fetch_stats.get("bytes", 0) + size
+        _fetch_stats["seconds"] = _fetch_stats.get("seconds", 0.0) + elapsed
+
+
+def fetch_page(url, max_bytes=MAX_PAGE_BYTES, timeout=WEBSITE_TIMEOUT, content_types=HTML_CONTENT_TYPES):
+    """
+    Stream a web page, reading at most max_bytes and for at most timeout seconds in total.
+    Raises ContentTypeError as soon as the headers show a type outside content_types,
+    before the body is downloaded. Bytes and latency are added to fetch_stats().
+    """
+    start = time.monotonic()
+    try:
+        response = get(url, timeout=timeout, stream=True)
+    except Exception:
+        _count("errors", elapsed=time.monotonic() - start)
+        raise
+
+    with response:
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_types and content_type and content_type not in content_types:
+            _count("skipped", elapsed=time.monotonic() - start)
+            raise ContentTypeError(f"Not a web page: {content_type} ({url})")
+
+        chunks = []
+        size = 0
+        truncated = False
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes or time.monotonic() - start > timeout:
+                    truncated = True
+                    break
+        except Exception:
+            _count("errors", size, time.monotonic() - start)
+            raise
+
+    content = b"".join(chunks)[:max_bytes]
+    elapsed = time.monotonic() - start
+    _count("truncated" if truncated else "complete", len(content), elapsed)
+    return FetchedPage(url, response.status_code, content, response.encoding, truncated, elapsed)
+
+
+def fetch_stats():
+    """Totals of fetch_page calls since the last reset, with the average latency"""
+    with _fetch_stats_lock:
+        stats = dict(_fetch_stats)
+    stats.setdefault("bytes", 0)
+    stats.setdefault("seconds", 0.0)
+    fetches = sum(stats.get(outcome, 0) for outcome in ("complete", "truncated", "skipped", "errors"))
+    stats["fetches"] = fetches
+    stats["avg_seconds"] = round(stats["seconds"] / fetches, 3) if fetches else 0.0
+    return stats
+
+
+def reset_fetch_stats():
+    with _fetch_stats_lock:
+        _fetch_stats.clear()
@@ -0,0 +1,94 @@
+import io
+import math
+import struct
+
+try:
+    from PIL import Image
+except ImportError:  # optional: without Pillow screenshots are sent as captured
+    Image = None
+
+# The vision model fits images into MAX_SIDE x MAX_SIDE, then scales the shortest side
+# down to SHORT_SIDE and bills 85 tokens plus 170 per 512px tile. Anything sent at a
+# higher resolution is downscaled on their side and only costs upload bytes.
+MAX_SIDE = 2048
+SHORT_SIDE = 768
+TILE_SIZE = 512
+BASE_TOKENS = 85
+TILE_TOKENS = 170
+
+DEFAULT_FORMAT = "jpeg"   # "jpeg", "webp" or "png"
+DEFAULT_QUALITY = 80
+DEFAULT_MAX_HEIGHT = 1600  # px, tall full-page captures are clipped (browser pool) and cropped to their top two screens
+
+MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+
+class PreparedImage:
+    """An image ready to send to the model, with what it costs"""
+
+    def __init__(self, data, mime, width, height, source_bytes):
+        self.data = data
+        self.mime = mime
+        self.width = width
+        self.height = height
+        self.source_bytes = source_bytes
+        self.tokens = estimate_tokens(width, height)
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def summary(self):
+        return (
+            f"{self.width}x{self.height} {self.mime}, {self.source_bytes / 1024:.0f} KiB -> "
+            f"{self.size / 1024:.0f} KiB, ~{self.tokens} tokens"
+        )
+
+
+def effective_size(width, height):
+    """Size the model actually looks at (high detail)"""
+    scale = min(1.0, MAX_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def estimate_tokens(width, height):
+    """Input tokens the model bills for an image of this size (high detail)"""
+    width, height = effective_size(width, height)
+    return BASE_TOKENS + TILE_TOKENS * math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+
+
+def png_size(data):
+    """(width, height) from a PNG header, without decoding the image"""
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("Not a PNG image")
+    return struct.unpack(">II", data[16:24])
+
+
+def prepare_screenshot(png, fmt=DEFAULT_FORMAT, quality=DEFAULT_QUALITY, max_height=DEFAULT_MAX_HEIGHT):
+    """
+    Crop a PNG screenshot to its top max_height pixels, downscale it to the model's
+    effective resolution and re-encode it as fmt. Without Pillow the PNG is returned
+    as is, labelled as PNG.
+    """
+    if Image is None:
+        width, height = png_size(png)
+        return PreparedImage(png, MIME_TYPES["png"], width, height, len(png))
+
+    with Image.open(io.BytesIO(png)) as image:
+        image.load()
+        if max_height and image.height > max_height:
+            image = image.crop((0, 0, image.width, max_height))
+        size = effective_size(image.width, image.height)
+        if size != image.size:
+            image = image.resize(size, Image.LANCZOS)
+        if fmt != "png":
+            image = image.convert("RGB")  # JPEG has no alpha
+
+        out = io.BytesIO()
+        if fmt == "png":
+            image.save(out, format="PNG", optimize=True)
+        else:
+            image.save(out, format=fmt.upper(), quality=quality)
+        return PreparedImage(out.getvalue(), MIME_TYPES[fmt], image.width, image.height, len(png))
@@ -0,0 +1,203 @@
+import json
+import sqlite3
+import threading
+import time
+
+from place import Place
+
+DEFAULT_DB_PATH = "leads.db"
+
+# Place status in the store
+STATUS_ENRICHED = "enriched"  # enriched locally, not in Notion yet
+STATUS_EXPORTED = "exported"  # a Notion page exists for it
+
+REPORT_FIELDS = ("ui_report", "brief", "pain_point_report", "email_subject", "email_sample", "skip_reason")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    display_name TEXT,
+    payload TEXT,       -- raw Places API JSON, NULL for ids only known from Notion
+    emails TEXT,        -- JSON list
+    lead_score REAL,
+    reports TEXT,       -- JSON object of REPORT_FIELDS
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_places_status ON places(status);
+
+-- Negative cache: places processed and rejected, skipped until expires_at
+CREATE TABLE IF NOT EXISTS rejections (
+    id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+NOTION_SYNC_KEY = "notion_last_edited_time"
+
+# Rejection reasons and how long each keeps a place from being processed again
+DAY = 24 * 60 * 60
+REJECT_NO_EMAIL = "no email"
+REJECT_CLOSED = "closed permanently"
+REJECT_NO_WEBSITE = "no website"
+REJECT_BELOW_THRESHOLD = "below threshold"
+REJECTION_TTLS = {
+    REJECT_NO_EMAIL: 30 * DAY,         # sites change, check again eventually
+    REJECT_CLOSED: 365 * DAY,
+    REJECT_NO_WEBSITE: 90 * DAY,
+    REJECT_BELOW_THRESHOLD: 30 * DAY,  # ratings and reviews move
+}
+
+
+class LeadStore:
+    """
+    Local SQLite store of every place the parser has seen, with its raw API payload and
+    enrichment results. It is the source of truth for dedupe; Notion is synced from it
+    incrementally instead of being re-read in full on every start.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        # One connection shared by pipeline threads, serialized by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("DELETE FROM rejections WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cur
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def __contains__(self, place_id):
+        return bool(self._query("SELECT 1 FROM places WHERE id = ?", (place_id,)))
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM places")[0][0]
+
+    def save_place(self, place: Place, status=STATUS_ENRICHED):
+        reports = {field: getattr(place, field) for field in REPORT_FIELDS}
+        self._execute(
+            """
+            INSERT INTO places (id, status, display_name, payload, emails, lead_score, reports, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                status = excluded.status,
+                display_name = excluded.display_name,
+                payload = excluded.payload,
+                emails = excluded.emails,
+                lead_score = excluded.lead_score,
+                reports = excluded.reports,
+                updated_at = excluded.updated_at
+            """,
+            (
+                place.id,
+                status,
+                place.display_name,
+                json.dumps(place.payload),
+                json.dumps(place.emails or []),
+                place.lead_score,
+                json.dumps(reports),
+                time.time(),
+            ),
+        )
+
+    def mark_exported(self, place_id):
+        self._execute(
+            "UPDATE places SET status = ?, updated_at = ? WHERE id = ?",
+            (STATUS_EXPORTED, time.time(), place_id),
+        )
+
+    def add_exported_ids(self, place_ids):
+        """Record ids that already have a Notion page (e.g. created by another machine)"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO places (id, status, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET status = excluded.status
+                """,
+                [(place_id, STATUS_EXPORTED, now) for place_id in place_ids],
+            )
+            self._conn.commit()
+
+    def reject(self, place_id, reason, ttl=None):
+        """Remember that a place was rejected so it isn't rebuilt until the TTL runs out"""
+        now = time.time()
+        ttl = ttl if ttl is not None else REJECTION_TTLS.get(reason, 30 * DAY)
+        self._execute(
+            """
+            INSERT INTO rejections (id, reason, created_at, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                reason = excluded.reason,
+                created_at = excluded.created_at,
+                expires_at = excluded.expires_at
+            """,
+            (place_id, reason, now, now + ttl),
+        )
+
+    def rejection_reason(self, place_id):
+        """Return why the place was rejected, or None if it isn't (or no longer) rejected"""
+        rows = self._query(
+            "SELECT reason FROM rejections WHERE id = ? AND expires_at > ?",
+            (place_id, time.time()),
+        )
+        return rows[0][0] if rows else None
+
+    def get_state(self, key):
+        rows = self._query("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_state(self, key, value):
+        self._execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def sync_from_notion(self, notion):
+        """
+        Pull place ids of Notion pages edited since the last sync into the store.
+        The first sync reads the whole data source; later ones only the recent edits.
+        """
+        since = self.get_state(NOTION_SYNC_KEY)
+        place_ids, high_water = notion.fetch_place_ids_since(since)
+        self.add_exported_ids(place_ids)
+        # Only advance the high-water mark after a complete sync
+        if high_water:
+            self.set_state(NOTION_SYNC_KEY, high_water)
+
+    def load_places(self, status=STATUS_ENRICHED):
+        """Re-hydrate stored places with the given status, without redoing any enrichment"""
+        rows = self._query(
+            "SELECT payload, emails, lead_score, reports FROM places WHERE status = ? AND payload IS NOT NULL",
+            (status,),
+        )
+        places = []
+        for payload, emails, lead_score, reports in rows:
+            place = Place(json.loads(payload))
+            place.emails = json.loads(emails or "[]")
+            place.lead_score = lead_score
+            for field, value in json.loads(reports or "{}").items():
+                setattr(place, field, value)
+            place._reports_done = place.has_reports()  # don't pay for stored reports again
+            places.append(place)
+        return places
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
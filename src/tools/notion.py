@@ -1,25 +1,97 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
 from place import Place
+from tools import http_client
 from tools.keys import get_secret
+from tools.rate_limiter import RateLimiter
 from datetime import datetime
 
+DEFAULT_MAX_WORKERS = 4  # concurrent per-page block fetches
+
+# Notion allows an average of 3 requests per second per integration
+NOTION_REQUESTS_PER_SECOND = 3
+MAX_RETRIES = 4
+
+# Shared by every Notion instance so concurrent exports and reads stay under the limit together
+rate_limiter = RateLimiter(NOTION_REQUESTS_PER_SECOND, burst=NOTION_REQUESTS_PER_SECOND)
+
 class Notion:
-    def __init__(self, api_key=None, database_id=None, data_source_id=None):
+    def __init__(self, api_key=None, database_id=None, data_source_id=None,
+                 store_email_properties=False, max_workers=DEFAULT_MAX_WORKERS):
         self.api_key = api_key or get_secret("NOTION_API_KEY")
         self.database_id = database_id or get_secret("NOTION_DATABASE_ID")
         self.data_source_id = data_source_id or get_secret("NOTION_DATA_SOURCE_ID")
+        # Also write subject/body to "Email Subject" / "Email Body" rich text properties
+        # (they must exist in the database). Reviewers edit the toggles, so the send job
+        # still reads those and only falls back to the properties when it can't
+        self.store_email_properties = store_email_properties
+        self.max_workers = max_workers
+        self._property_ids = {}
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "Notion-Version": "2025-09-03",
         }
 
+    def _request(self, method, url, retry_server_errors=True, **kwargs):
+        """
+        Send a Notion API request through the shared rate limiter.
+        429 and 5xx responses are retried after Retry-After (or exponential backoff).
+        Pass retry_server_errors=False for requests that aren't idempotent (page creation):
+        a 5xx may come after Notion committed the write, so only 429 is retried. Connection
+        errors are retried by the shared session only before the request was sent.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            rate_limiter.acquire()
+            res = http_client.request(method, url, headers=self.headers, **kwargs)
+
+            if res.status_code != 429 and (res.status_code < 500 or not retry_server_errors):
+                return res
+            if attempt == MAX_RETRIES:
+                return res
+
+            try:
+                delay = float(res.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                delay = 2 ** attempt
+            print(f"⏳ Notion returned {res.status_code}, retrying in {delay:.1f}s")
+            # Pause every caller, not just this one: the limit is per integration
+            rate_limiter.pause(delay)
+        return res
+
     @staticmethod
     def chunk_text(text, max_length=1500):
         if not text:
             return ["No content available."]
         return [text[i:i + max_length - 1] for i in range(0, len(text), max_length - 1)]
 
+    @classmethod
+    def make_rich_text(cls, text):
+        if not text:
+            return []
+        # A rich text property holds at most 100 text objects
+        return [{"text": {"content": chunk}} for chunk in cls.chunk_text(text)][:100]
+
+    @staticmethod
+    def rich_text_value(prop):
+        text = "".join(rt.get("plain_text") or rt["text"]["content"] for rt in prop.get("rich_text", []))
+        return text.strip() or None
+
+    @staticmethod
+    def split_subject_and_body(full_text):
+        """Split an email sample into subject and body if it starts with a 'Subject:' line"""
+        subject = None
+        body = None
+
+        if "Subject:" in full_text:
+            parts = full_text.split("Subject:", 1)[1].strip().split("\n", 1)
+            subject = parts[0].strip()
+            body = parts[1].strip() if len(parts) > 1 else ""
+        else:
+            body = full_text
+
+        return subject, body
+
     def make_toggle_block(self, title: str, content: str):
         children = [
             {
@@ -74,16 +146,60 @@ class Notion:
             ],
         }
 
-        res = requests.post(url, headers=self.headers, json=data)
+        if self.store_email_properties and place.email_sample:
+            sample_subject, body = self.split_subject_and_body(place.email_sample.strip())
+            data["properties"]["Email Subject"] = {"rich_text": self.make_rich_text(place.email_subject or sample_subject)}
+            data["properties"]["Email Body"] = {"rich_text": self.make_rich_text(body)}
+
+        # A retried 5xx could create the page twice
+        res = self._request("POST", url, retry_server_errors=False, json=data)
         if res.status_code == 200:
             print(f"✅ Created Notion page for {place.display_name}")
+            return True
         else:
             print(f"❌ Error: {res.status_code} - {res.text}")
+            return False
+
+    def _property_id(self, name):
+        """Look up a property's id in the data source schema (needed for filter_properties)"""
+        if name not in self._property_ids:
+            url = f"https://api.notion.com/v1/data_sources/{self.data_source_id}"
+            res = self._request("GET", url)
+            if res.status_code != 200:
+                print(f"⚠️ Could not read data source schema: {res.status_code} - {res.text}")
+                return None
+            for prop_name, prop in res.json().get("properties", {}).items():
+                # Ids come back URL-encoded; requests encodes them again as query params
+                self._property_ids[prop_name] = unquote(prop.get("id", ""))
+        return self._property_ids.get(name)
 
     def fetch_all_place_ids(self):
+        place_ids, _ = self.fetch_place_ids_since()
+        return place_ids
+
+    def fetch_place_ids_since(self, since=None):
+        """
+        Fetch the Google Place IDs of pages edited on or after `since` (ISO timestamp; all
+        pages when None), requesting only the Google Place ID property.
+        Returns (place_ids, high_water), where high_water is the latest last_edited_time
+        seen, to pass as `since` next time. high_water is None if the query failed midway.
+        """
         url = f"https://api.notion.com/v1/data_sources/{self.data_source_id}/query"
         place_ids = set()
-        payload = {"page_size": 100}
+        payload = {
+            "page_size": 100,
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+        }
+        if since:
+            # last_edited_time is rounded to the minute, so on_or_after may return a few pages again
+            payload["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+
+        params = {}
+        property_id = self._property_id("Google Place ID")
+        if property_id:
+            params["filter_properties"] = [property_id]
+
+        high_water = since
         has_more = True
         next_cursor = None
 
@@ -91,10 +207,10 @@ class Notion:
             if next_cursor:
                 payload["start_cursor"] = next_cursor
 
-            res = requests.post(url=url, headers=self.headers, json=payload)
+            res = self._request("POST", url, params=params, json=payload)
             if res.status_code != 200:
                 print(f"❌ Error fetching place IDs: {res.status_code} - {res.text}")
-                break
+                return place_ids, None
 
             data = res.json()
             results = data.get("results", [])
@@ -110,11 +226,15 @@ class Notion:
                 except Exception as e:
                     print(f"⚠️ Error parsing place ID: {e}")
 
+                edited = page.get("last_edited_time")
+                if edited and (high_water is None or edited > high_water):
+                    high_water = edited
+
             has_more = data.get("has_more", False)
             next_cursor = data.get("next_cursor")
 
-        print(f"📦 Retrieved {len(place_ids)} existing place IDs from Notion data source.")
-        return place_ids
+        print(f"📦 Retrieved {len(place_ids)} place IDs from Notion data source" + (f" edited since {since}." if since else "."))
+        return place_ids, high_water
 
     def fetch_reviewed_leads(self):
         """Fetch reviewed leads with Email property and Email toggle contents."""
@@ -135,7 +255,7 @@ class Notion:
             if next_cursor:
                 payload["start_cursor"] = next_cursor
 
-            res = requests.post(query_url, headers=self.headers, json=payload)
+            res = self._request("POST", query_url, json=payload)
             if res.status_code != 200:
                 print(f"❌ Error fetching reviewed leads: {res.status_code} - {res.text}")
                 break
@@ -146,27 +266,26 @@ class Notion:
             for page in results:
                 try:
                     page_id = page["id"]
+                    properties = page["properties"]
 
                     # Basic info
-                    name_prop = page["properties"].get("Name", {}).get("title", [])
+                    name_prop = properties.get("Name", {}).get("title", [])
                     name = name_prop[0]["text"]["content"] if name_prop else "Unnamed"
 
-                    google_place_id_prop = page["properties"].get("Google Place ID", {}).get("rich_text", [])
+                    google_place_id_prop = properties.get("Google Place ID", {}).get("rich_text", [])
                     google_place_id = google_place_id_prop[0]["text"]["content"] if google_place_id_prop else None
 
-                    email_prop = page["properties"].get("Email", {}).get("rich_text", [])
+                    email_prop = properties.get("Email", {}).get("rich_text", [])
                     email = email_prop[0]["text"]["content"] if email_prop else None
 
-                    # Fetch Email Subject + Email Sample content
-                    email_info = self._fetch_email_sample_toggle(page_id)
-
                     reviewed_leads.append({
                         "id": page_id,
                         "name": name,
                         "google_place_id": google_place_id,
                         "email": email,
-                        "email_subject": email_info.get("email_subject"),
-                        "email_body": email_info.get("email_body"),
+                        # The draft set at export time when store_email_properties is on
+                        "email_subject": self.rich_text_value(properties.get("Email Subject", {})),
+                        "email_body": self.rich_text_value(properties.get("Email Body", {})),
                     })
 
                 except Exception as e:
@@ -175,11 +294,36 @@ class Notion:
             has_more = data.get("has_more", False)
             next_cursor = data.get("next_cursor")
 
+        # Fetch Email Subject + Email Sample toggle contents, a few pages at a time since each
+        # one takes several block requests. The toggles hold the reviewer's edits, so they win
+        # over the draft in the properties, which only fills in a missing or empty toggle.
+        # A page whose toggles can't be read is left out rather than sent as the draft.
+        if reviewed_leads:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                email_infos = list(executor.map(self._try_fetch_email_sample_toggle, [lead["id"] for lead in reviewed_leads]))
+
+            failed = set()
+            for lead, email_info in zip(reviewed_leads, email_infos):
+                if email_info is None:
+                    print(f"⚠️ Error parsing reviewed lead: could not read email toggles of {lead['name']}")
+                    failed.add(lead["id"])
+                    continue
+                lead["email_subject"] = email_info.get("email_subject") or lead["email_subject"]
+                lead["email_body"] = email_info.get("email_body") or lead["email_body"]
+            reviewed_leads = [lead for lead in reviewed_leads if lead["id"] not in failed]
+
         print(f"📋 Retrieved {len(reviewed_leads)} reviewed leads with Email Subjects and Samples.")
         return reviewed_leads
 
 
 
+    def _try_fetch_email_sample_toggle(self, page_id):
+        try:
+            return self._fetch_email_sample_toggle(page_id)
+        except Exception as e:
+            print(f"⚠️ Error fetching email toggles for page {page_id}: {e}")
+            return None
+
     def _fetch_email_sample_toggle(self, page_id):
         """Retrieve the content of the 'Email Sample' and 'Email Subject' toggles for a given page."""
         blocks_url = f"https://api.notion.com/v1/blocks/{page_id}/children"
@@ -193,7 +337,7 @@ class Notion:
             if next_cursor:
                 params["start_cursor"] = next_cursor
 
-            res = requests.get(blocks_url, headers=self.headers, params=params)
+            res = self._request("GET", blocks_url, params=params)
             if res.status_code != 200:
                 print(f"❌ Error fetching blocks for page {page_id}: {res.status_code} - {res.text}")
                 return None
@@ -229,7 +373,7 @@ class Notion:
     def _extract_toggle_paragraph(self, toggle_id):
         """Extract plain paragraph text from a simple toggle block."""
         toggle_url = f"https://api.notion.com/v1/blocks/{toggle_id}/children"
-        res = requests.get(toggle_url, headers=self.headers)
+        res = self._request("GET", toggle_url)
         if res.status_code != 200:
             print(f"❌ Error fetching toggle children: {res.status_code} - {res.text}")
             return None
@@ -248,7 +392,7 @@ class Notion:
     def _extract_toggle_content(self, toggle_id):
         """Extract the subject and body text from the children of an 'Email Sample' toggle block."""
         toggle_url = f"https://api.notion.com/v1/blocks/{toggle_id}/children"
-        res = requests.get(toggle_url, headers=self.headers)
+        res = self._request("GET", toggle_url)
         if res.status_code != 200:
             print(f"❌ Error fetching toggle children: {res.status_code} - {res.text}")
             return {"email_subject": None, "email_body": None}
@@ -266,15 +410,7 @@ class Notion:
         full_text = "\n".join(contents).strip()
 
         # Extract subject and body
-        subject = None
-        body = None
-
-        if "Subject:" in full_text:
-            parts = full_text.split("Subject:", 1)[1].strip().split("\n", 1)
-            subject = parts[0].strip()
-            body = parts[1].strip() if len(parts) > 1 else ""
-        else:
-            body = full_text
+        subject, body = self.split_subject_and_body(full_text)
 
         return {
             "email_subject": subject,
@@ -292,7 +428,7 @@ class Notion:
             }
         }
 
-        res = requests.patch(url, headers=self.headers, json=payload)
+        res = self._request("PATCH", url, json=payload)
 
         if res.status_code == 200:
             print(f"✅ Successfully updated Lead Status to 'Sent' for page {page_id}")
@@ -1,31 +1,257 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
+
+import numpy as np
 from textblob import TextBlob
 
+# Sentiment modes
+COMPAT = "compat"  # TextBlob, exactly as score_review_text
+FAST = "fast"      # lexicon lookup over all texts at once, close to TextBlob but not identical
+
+MEMO_MAX_ENTRIES = 100_000   # in memory; the memo file keeps every score
+DEFAULT_MEMO_PATH = os.path.join(".cache", "review_scores.db")
+MEMO_QUERY_SIZE = 500        # keys looked up per query in the memo file
+MIN_TEXTS_PER_PROCESS = 50  # below this a process pool costs more than it saves
+
+# TextBlob's tokenizer splits "don't" into "do" + "n't"
+TOKEN_REGEX = re.compile(r"[a-z]+(?=n't)|n't|[a-z]+(?:'[a-z]+)?|!")
+
+_memo = {}
+_memo_lock = threading.Lock()
+_memo_path = DEFAULT_MEMO_PATH
+_memo_db = None
+_lexicon = None
+
+
 def score_review_text(review_text: str) -> float:
     """
     Score a Google review text from 1 (negative) to 5 (positive) using TextBlob.
     """
     if not review_text:
         return 3.0  # neutral if empty
-    
+
     polarity = TextBlob(review_text).sentiment.polarity  # -1 to 1
     # Map -1 → 1, 0 → 3, +1 → 5
     score = ((polarity + 1) / 2) * 4 + 1
     return round(score, 2)
 
-def score_reviews_list(review_list: List[dict]):
+
+def _load_lexicon():
+    """TextBlob's pattern lexicon as {word: (polarity, intensity, is_modifier)}, loaded once"""
+    global _lexicon
+    if _lexicon is None:
+        from textblob.en import sentiment
+
+        sentiment.load()
+        lexicon = {}
+        for word, tags in sentiment.items():
+            if None in tags:  # plain strings are scored without part-of-speech tags
+                polarity, _, intensity = tags[None]
+                modifier = any(tag in tags for tag in sentiment.modifiers)
+                lexicon[word] = (polarity, intensity, modifier)
+        _lexicon = (lexicon, frozenset(sentiment.negations))
+    return _lexicon
+
+
+def _fast_scores(texts: List[str]) -> List[float]:
+    """
+    Lexicon scoring of all texts in one pass: tokens of every text are laid out in
+    one array and polarities are averaged per text with NumPy. Like TextBlob, an
+    intensifier merges into the next known word ("very good") and a negation right
+    before a known word or intensifier, or one letter earlier, flips and halves it.
+    """
+    lexicon, negations = _load_lexicon()
+    unknown = (0.0, 1.0, False)
+
+    doc_ids, tokens = [], []
+    for doc_id, text in enumerate(texts):
+        words = TOKEN_REGEX.findall(text.lower()) if text else []
+        tokens.extend(words)
+        doc_ids.extend([doc_id] * len(words))
+    if not tokens:
+        return [3.0] * len(texts)
+
+    doc_ids = np.array(doc_ids)
+    entries = [lexicon.get(token, unknown) for token in tokens]
+    known = np.array([token in lexicon for token in tokens])
+    polarity = np.array([entry[0] for entry in entries], dtype=np.float64)
+    intensity = np.array([entry[1] for entry in entries], dtype=np.float64)
+    modifier = known & np.array([entry[2] for entry in entries])
+    negation = np.array([token in negations for token in tokens])
+    short = np.array([len(token.strip("'")) <= 1 for token in tokens])
+    exclamation = np.array([token == "!" for token in tokens])
+
+    def previous(values, steps=1, fill=False):
+        shifted = np.full_like(values, fill)
+        shifted[steps:] = values[:-steps]
+        same_doc = np.zeros(len(tokens), dtype=bool)
+        same_doc[steps:] = doc_ids[steps:] == doc_ids[:-steps]
+        return shifted & same_doc if values.dtype == bool else np.where(same_doc, shifted, fill)
+
+    # "very good": the intensifier scales the word and stops counting on its own
+    modified = known & previous(modifier)
+    polarity = np.where(modified, np.clip(polarity * previous(intensity, fill=1.0), -1.0, 1.0), polarity)
+    absorbed = np.zeros(len(tokens), dtype=bool)
+    absorbed[:-1] = modified[1:]
+    counted = known & ~absorbed
+
+    # "!" boosts the word right before it
+    boosted = np.zeros(len(tokens), dtype=bool)
+    boosted[:-1] = exclamation[1:] & known[:-1] & (doc_ids[1:] == doc_ids[:-1])
+    polarity = np.where(boosted, np.clip(polarity * 1.25, -1.0, 1.0), polarity)
+
+    # "not good", "not a good", "not very good"
+    negated = previous(negation) | (previous(negation, 2) & previous(short))
+    negated |= modified & (previous(negation, 2) | (previous(negation, 3) & previous(short, 2)))
+    polarity = np.where(negated & counted, polarity * -0.5, polarity)
+
+    totals = np.bincount(doc_ids, weights=np.where(counted, polarity, 0.0), minlength=len(texts))
+    counts = np.bincount(doc_ids, weights=counted.astype(np.float64), minlength=len(texts))
+    polarities = totals / np.maximum(counts, 1)
+
+    scores = ((polarities + 1) / 2) * 4 + 1
+    return [round(score, 2) for score in scores.tolist()]
+
+
+def _score_uncached(texts: List[str], mode: str) -> List[float]:
+    if mode == FAST:
+        return _fast_scores(texts)
+    if mode == COMPAT:
+        return [score_review_text(text) for text in texts]
+    raise ValueError(f"Unknown sentiment mode: {mode}")
+
+
+def _memo_key(text: str, mode: str):
+    return mode, hashlib.sha1((text or "").encode("utf-8")).digest()
+
+
+def set_memo_path(path):
+    """Keep scores across runs in the SQLite file at path, or only in memory if path is None"""
+    global _memo_path, _memo_db
+    with _memo_lock:
+        if _memo_db is not None:
+            _memo_db.close()
+        _memo_path, _memo_db = path, None
+
+
+def _memo_file():
+    """The memo file's connection, opened on first use. Call with _memo_lock held."""
+    global _memo_db
+    if _memo_db is None and _memo_path:
+        directory = os.path.dirname(_memo_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _memo_db = sqlite3.connect(_memo_path, check_same_thread=False)
+        _memo_db.execute(
+            "CREATE TABLE IF NOT EXISTS scores (mode TEXT, hash BLOB, score REAL, PRIMARY KEY (mode, hash))"
+        )
+    return _memo_db
+
+
+def _load_scores(keys):
+    """Scores of keys stored in the memo file by earlier runs, as {key: score}"""
+    found = {}
+    with _memo_lock:
+        db = _memo_file()
+        if db is None:
+            return found
+        by_mode = {}
+        for mode, digest in keys:
+            by_mode.setdefault(mode, []).append(digest)
+        for mode, digests in by_mode.items():
+            for i in range(0, len(digests), MEMO_QUERY_SIZE):
+                chunk = digests[i:i + MEMO_QUERY_SIZE]
+                rows = db.execute(
+                    f"SELECT hash, score FROM scores WHERE mode = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    [mode, *chunk],
+                ).fetchall()
+                found.update(((mode, digest), score) for digest, score in rows)
+    return found
+
+
+def _save_scores(scores):
+    with _memo_lock:
+        db = _memo_file()
+        if db is None:
+            return
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO scores (mode, hash, score) VALUES (?, ?, ?)",
+                [(mode, digest, score) for (mode, digest), score in scores.items()],
+            )
+
+
+def _remember(scores):
+    with _memo_lock:
+        if len(_memo) + len(scores) > MEMO_MAX_ENTRIES:
+            # Drop the oldest entries (dicts keep insertion order)
+            for key in list(_memo)[:len(_memo) + len(scores) - MEMO_MAX_ENTRIES]:
+                del _memo[key]
+        _memo.update(scores)
+
+
+def score_review_texts(texts: List[str], mode: str = COMPAT, processes: int = None) -> List[float]:
+    """
+    Score many review texts at once, from 1 (negative) to 5 (positive).
+    Scores are memoized by a hash of the text, in memory and in the memo file (see
+    set_memo_path), so a review is only scored the first time any run sees it.
+    In COMPAT mode every score equals score_review_text; FAST mode trades exactness
+    for speed. processes > 1 spreads large batches over a process pool.
+    """
+    keys = [_memo_key(text, mode) for text in texts]
+    with _memo_lock:
+        scores = [_memo.get(key) for key in keys]
+
+    missing = {}  # key -> text, deduplicated
+    for key, text, score in zip(keys, texts, scores):
+        if score is None:
+            missing.setdefault(key, text or "")
+
+    if missing:
+        stored = _load_scores(list(missing))
+        if stored:
+            for key in stored:
+                del missing[key]
+            _remember(stored)
+            scores = [stored.get(key, score) if score is None else score for key, score in zip(keys, scores)]
+
+    if missing:
+        pending = list(missing.values())
+        if processes and processes > 1 and len(pending) >= 2 * MIN_TEXTS_PER_PROCESS:
+            size = max(MIN_TEXTS_PER_PROCESS, -(-len(pending) // processes))
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = [score for chunk in executor.map(_score_uncached, chunks, [mode] * len(chunks)) for score in chunk]
+        else:
+            results = _score_uncached(pending, mode)
+
+        computed = dict(zip(missing, results))
+        _remember(computed)
+        _save_scores(computed)
+        scores = [computed[key] if score is None else score for key, score in zip(keys, scores)]
+
+    return scores
+
+
+def score_reviews_list(review_list: List[dict], mode: str = COMPAT):
     """
     Given a list of Google review objects, return:
       - avg score
       - dict mapping review 'name' to score
     """
+    texts = [review.get("text", {}).get("text", "") for review in review_list]
+    review_scores = score_review_texts(texts, mode=mode)
+
     scores = {}
     sum_scores = 0
     count = 0
 
-    for review in review_list:
-        text = review.get("text", {}).get("text", "")
-        review_score = score_review_text(text)
+    for text, review_score in zip(texts, review_scores):
         sum_scores += review_score
         count += 1
         scores[text] = review_score
@@ -0,0 +1,144 @@
+import math
+
+import numpy as np
+
+from tools.email import score_email
+from tools.reviews import score_review_texts
+
+# Weights of Place.score_place
+OPERATIONAL_POINTS = 3
+FRICTION_WEIGHT = 2
+REVIEW_SUMMARY_POINTS = 2
+MAPS_URI_POINTS = 1
+WEBSITE_POINTS = 2
+MAX_RAW_SCORE = 18
+
+# Defaults of Place.update_score_with_email_and_reviews
+DEFAULT_EMAIL_WEIGHT = 0.3
+DEFAULT_REVIEW_WEIGHT = 0.1
+DEFAULT_ORIGINAL_SCORE_WEIGHT = 0.6
+
+
+def _round(values, digits=2):
+    # Python's round, not np.round: they disagree on some halfway cases and results
+    # must match the per-object scores exactly
+    return np.array([round(value, digits) for value in values.tolist()], dtype=np.float64)
+
+
+def _log10_1p(counts):
+    # math.log once per distinct count, as np.log can differ from it in the last bit
+    unique, inverse = np.unique(counts, return_inverse=True)
+    logs = np.array([math.log(1 + count, 10) for count in unique.tolist()], dtype=np.float64)
+    return logs[inverse].reshape(counts.shape)
+
+
+def base_scores(statuses, ratings, rating_counts, has_review_summary, has_maps_uri, has_website):
+    """
+    Place.score_place over columns, one entry per place. Missing ratings and counts
+    are given as 0 or NaN. Returns a float array equal to the per-object scores.
+    """
+    statuses = np.asarray(statuses, dtype=object)
+    ratings = np.nan_to_num(np.asarray(ratings, dtype=np.float64))
+    rating_counts = np.nan_to_num(np.asarray(rating_counts, dtype=np.float64))
+
+    raw = np.where(statuses == "OPERATIONAL", OPERATIONAL_POINTS, 0).astype(np.float64)
+
+    # Friction Index (reviews x low rating), or the plain rating without a count
+    has_rating = ratings != 0
+    has_count = has_rating & (rating_counts != 0)
+    friction = np.zeros_like(raw)
+    if has_count.any():
+        friction[has_count] = (5 - ratings[has_count]) * _log10_1p(rating_counts[has_count]) * FRICTION_WEIGHT
+    friction = np.where(has_rating & ~has_count, 5 - ratings, friction)
+    raw = raw + friction  # same summation order as score_place
+
+    raw = raw + np.where(np.asarray(has_review_summary, dtype=bool), REVIEW_SUMMARY_POINTS, 0)
+    raw = raw + np.where(np.asarray(has_maps_uri, dtype=bool), MAPS_URI_POINTS, 0)
+    raw = raw + np.where(np.asarray(has_website, dtype=bool), WEBSITE_POINTS, 0)
+
+    normalized = np.minimum(5, (raw / MAX_RAW_SCORE) * 5)
+    normalized = np.where(statuses == "CLOSED_PERMANENTLY", 0.0, normalized)
+    return _round(normalized)
+
+
+def combined_scores(
+    original_scores,
+    best_email_scores,
+    review_sentiments,
+    email_weight=DEFAULT_EMAIL_WEIGHT,
+    review_weight=DEFAULT_REVIEW_WEIGHT,
+    original_score_weight=DEFAULT_ORIGINAL_SCORE_WEIGHT,
+):
+    """
+    Place.update_score_with_email_and_reviews over columns. best_email_scores is NaN
+    for places without emails and review_sentiments (1-5) is NaN for places without reviews.
+    """
+    original_scores = np.asarray(original_scores, dtype=np.float64)
+    best_email_scores = np.asarray(best_email_scores, dtype=np.float64)
+    review_sentiments = np.asarray(review_sentiments, dtype=np.float64)
+
+    best_email_scores = np.where(np.isnan(best_email_scores), 1, best_email_scores)  # minimal if no email
+    # invert so more bad reviews better the lead, neutral if no reviews
+    review_scores = np.where(np.isnan(review_sentiments), 3, 6 - review_sentiments)
+
+    combined = (
+        original_scores * original_score_weight
+        + best_email_scores * email_weight
+        + review_scores * review_weight
+    )
+    return _round(np.minimum(np.maximum(combined, 1), 5))
+
+
+def lead_scores(base, best_email_scores, review_sentiments, **weights):
+    """Final lead scores as Place.enrich_score sets them: only places with emails are combined"""
+    base = np.asarray(base, dtype=np.float64)
+    best_email_scores = np.asarray(best_email_scores, dtype=np.float64)
+    combined = combined_scores(base, best_email_scores, review_sentiments, **weights)
+    return np.where(np.isnan(best_email_scores), base, combined)
+
+
+def place_columns(places, processes=None):
+    """Columns for base_scores and lead_scores from a list of Place objects"""
+    # Score every review text in one batch first; review_sentiment then reads the memo
+    texts = [
+        review.get("text", {}).get("text", "")
+        for place in places if place.reviews
+        for review in place.reviews
+    ]
+    if texts:
+        score_review_texts(texts, mode=places[0].SENTIMENT_MODE, processes=processes)
+
+    columns = {
+        "statuses": [place.business_status for place in places],
+        "ratings": [place.rating or 0 for place in places],
+        "rating_counts": [place.user_rating_count or 0 for place in places],
+        "has_review_summary": [bool(place.review_summary) for place in places],
+        "has_maps_uri": [bool(place.google_maps_uri) for place in places],
+        "has_website": [bool(place.website_uri) for place in places],
+        "best_email_scores": [
+            max(score_email(email) for email in place.emails) if place.emails else np.nan
+            for place in places
+        ],
+        "review_sentiments": [
+            place.review_sentiment() if place.reviews else np.nan for place in places
+        ],
+    }
+    return {name: np.asarray(values) for name, values in columns.items()}
+
+
+def score_places(places, processes=None, **weights):
+    """
+    Re-score places in one pass, e.g. stored leads after tuning weights.
+    Returns (base scores, lead scores) as arrays in the order of places.
+    processes is passed on to review sentiment scoring.
+    """
+    columns = place_columns(places, processes=processes)
+    base = base_scores(
+        columns["statuses"],
+        columns["ratings"],
+        columns["rating_counts"],
+        columns["has_review_summary"],
+        columns["has_maps_uri"],
+        columns["has_website"],
+    )
+    return base, lead_scores(base, columns["best_email_scores"], columns["review_sentiments"], **weights)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# The app runs from src/ with its packages importable at the top level
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Secrets are read at import time; tests never reach the real services
+for key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "NOTION_API_KEY", "NOTION_DATABASE_ID", "NOTION_DATA_SOURCE_ID"):
+    os.environ.setdefault(key, "test")
+
+
+import pytest
+
+from tools import reviews
+
+
+@pytest.fixture(autouse=True)
+def review_memo_file(tmp_path):
+    """Keep review sentiment scores out of the working tree's .cache/"""
+    reviews.set_memo_path(str(tmp_path / "review_scores.db"))
+    yield
+    reviews.set_memo_path(None)
@@ -0,0 +1,51 @@
+import pytest
+
+from parsers.email_extractor import extract_emails
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Write to jane [at] example [dot] com today", "jane@example.com"),
+        ("jane(at)example.com", "jane@example.com"),
+        ("Mail jane (at) example.com.", "jane@example.com"),
+        ("jane {at} example {dot} co {dot} uk", "jane@example.co.uk"),
+        ("jane [at] example dot co dot uk", "jane@example.co.uk"),
+        ("jane [AT] my-shop (DOT) org", "jane@my-shop.org"),
+    ],
+)
+def test_obfuscated_addresses(text, expected):
+    assert extract_emails(f"<p>{text}</p>") == {expected}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Lunch specials (at) noon. Dinner from 6pm",
+        "Prices start (at) 19.99",
+        "Follow us (at) instagram.com/bakery",
+        "Open (at) 9 . 30 every day",
+        "Find us (at) the market [dot] 42",
+    ],
+)
+def test_prose_is_not_an_address(text):
+    assert extract_emails(f"<p>{text}</p>") == set()
+
+
+def test_plain_and_mailto_addresses():
+    page = '<a href="mailto:Owner%40shop.com?subject=Hi">Mail</a><p>or sales@shop.com.</p>'
+    assert extract_emails(page) == {"Owner@shop.com", "sales@shop.com"}
+
+
+def test_stray_less_than_keeps_the_text():
+    assert extract_emails("<p>a < b and jane@shop.com</p>") == {"jane@shop.com"}
+    assert extract_emails("<p>1<2, write to jane [at] shop [dot] com</p>") == {"jane@shop.com"}
+
+
+def test_hidden_mailto_links_are_ignored():
+    page = (
+        '<!-- <a href="mailto:old@shop.com">Old</a> -->'
+        '<script>link.href = "mailto:js@shop.com";</script>'
+        '<a href="mailto:jane@shop.com">Mail</a>'
+    )
+    assert extract_emails(page) == {"jane@shop.com"}
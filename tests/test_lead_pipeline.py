@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+from lead_pipeline import LeadPipeline
+from place import Place
+from tools.lead_store import LeadStore
+
+RUN_TIMEOUT = 20  # s, a hung pipeline fails the test instead of the whole run
+
+
+class FakeNotion:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.exported = []
+
+    def export_place(self, place):
+        if place.id in self.fail:
+            raise RuntimeError("Notion is down")
+        self.exported.append(place.id)
+        return True
+
+
+class FakeParser:
+    """What LeadPipeline needs from PlaceParser, with a fixed search result"""
+
+    def __init__(self, db_path, count, notion=None):
+        self.places = {}
+        self.store = LeadStore(db_path)
+        self.agent = None
+        self.notion = notion or FakeNotion()
+        self.count = count
+
+    def is_known(self, place_id):
+        return place_id in self.places
+
+    def iter_places(self, search_query):
+        for i in range(self.count):
+            yield {
+                "id": str(i),
+                "displayName": {"text": f"Shop {i}"},
+                "websiteUri": f"https://shop{i}.example",
+                "businessStatus": "OPERATIONAL",
+            }
+
+
+@pytest.fixture
+def find_email(monkeypatch):
+    """Replace the website lookup; tests set delays[place_id] or waits[place_id] to slow places down"""
+    delays, waits = {}, {}
+
+    def fake_find_email(place):
+        time.sleep(delays.get(place.id, 0))
+        if place.id in waits:
+            waits[place.id].wait(RUN_TIMEOUT)
+        return [f"owner@shop{place.id}.example"]
+
+    monkeypatch.setattr(Place, "find_email", fake_find_email)
+    return delays, waits
+
+
+def run(pipeline, **kwargs):
+    """pipeline.run on a thread, returning the exception it raised, if any"""
+    result = {}
+
+    def target():
+        try:
+            pipeline.run(["shops"], **kwargs)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(RUN_TIMEOUT)
+    assert not thread.is_alive(), "pipeline did not return"
+    return result.get("error")
+
+
+def test_exports_in_search_order(tmp_path, find_email):
+    delays, _ = find_email
+    delays.update({str(i): 0.01 * (i % 4) for i in range(30)})  # finish out of order
+    parser = FakeParser(str(tmp_path / "leads.db"), 30)
+    seen = []
+
+    error = run(LeadPipeline(parser, queue_size=2), export=True, on_export=lambda place: seen.append(place.id),
+                generate_reports=False)
+
+    assert error is None
+
+    expected = [str(i) for i in range(30)]
+    assert seen == expected
+    assert sorted(parser.notion.exported, key=int) == expected
+    assert parser.store.load_places() == []  # every stored place was marked exported
+
+
+def test_slow_place_is_skipped_after_max_pending(tmp_path, find_email):
+    _, waits = find_email
+    head = waits["0"] = threading.Event()
+    parser = FakeParser(str(tmp_path / "leads.db"), 20)
+    seen = []
+
+    def on_export(place):
+        seen.append(place.id)
+        if len(seen) == 10:
+            head.set()  # only released once later places were let past it
+
+    # One worker besides the blocked one per stage, so nothing but the head can fall behind
+    pipeline = LeadPipeline(parser, email_workers=2, score_workers=1, report_workers=1, queue_size=2, max_pending=3)
+    error = run(pipeline, export=True, on_export=on_export, generate_reports=False)
+
+    assert error is None
+    assert head.is_set()
+    assert sorted(seen, key=int) == [str(i) for i in range(20)]
+    assert seen.index("0") >= 10
+    others = [place_id for place_id in seen if place_id != "0"]
+    assert others == sorted(others, key=int)  # the rest keep search order
+
+
+def test_failures_only_skip_their_place(tmp_path, find_email, monkeypatch):
+    parser = FakeParser(str(tmp_path / "leads.db"), 12, notion=FakeNotion(fail={"3"}))
+    save_place = parser.store.save_place
+
+    def flaky_save(place):
+        if place.id == "5":
+            raise OSError("disk full")
+        save_place(place)
+
+    monkeypatch.setattr(parser.store, "save_place", flaky_save)
+    seen = []
+
+    def on_export(place):
+        seen.append(place.id)
+        if place.id == "7":
+            raise ValueError("UI update failed")
+
+    error = run(LeadPipeline(parser, queue_size=2), export=True, on_export=on_export, generate_reports=False)
+
+    assert error is None
+    assert seen == [str(i) for i in range(12) if i != 5]  # the store failure is not reported
+    assert sorted(parser.notion.exported, key=int) == [str(i) for i in range(12) if i not in (3, 5)]
+    # The failed export stays stored but unexported, for sync_to_notion to retry
+    assert [place.id for place in parser.store.load_places()] == ["3"]
+
+
+def test_export_stage_failure_drains_the_pipeline(tmp_path, find_email, monkeypatch):
+    parser = FakeParser(str(tmp_path / "leads.db"), 100)
+
+    def broken_finish(exporting, on_export, wait=False):
+        if exporting:
+            raise KeyError("bug")
+
+    monkeypatch.setattr(LeadPipeline, "_finish_exports", staticmethod(broken_finish))
+    pipeline = LeadPipeline(parser, queue_size=2)
+
+    error = run(pipeline, generate_reports=False)
+
+    assert isinstance(error, KeyError)
+    assert pipeline.stats["stored"] < 100  # upstream stages stopped early
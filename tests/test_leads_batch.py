@@ -0,0 +1,75 @@
+from agents.leads_batch import LeadsBatch, LocalBatchRunner
+from place import Place
+
+
+class FakeAgent:
+    """Builds prompts that name their place, so answers can be traced back to it"""
+
+    def ui_report_content(self, url):
+        return [{"type": "input_text", "text": f"ui {url}"}]
+
+    def business_brief_content(self, url):
+        return [{"type": "input_text", "text": f"brief {url}"}]
+
+    def pain_points_content(self, brief, ui_report, reviews):
+        return [{"type": "input_text", "text": f"pain {brief}"}]
+
+    def email_subject_content(self, business_name, brief):
+        return [{"type": "input_text", "text": f"subject {business_name}"}]
+
+    def personalized_email_content(self, email, business_name, brief, pain_point_report):
+        return [{"type": "input_text", "text": f"email {email}"}]
+
+
+def echo(body):
+    return "answer to " + body["input"][0]["content"][0]["text"]
+
+
+def make_place(place_id):
+    place = Place({
+        "id": place_id,
+        "displayName": {"text": f"Shop {place_id}"},
+        "websiteUri": f"https://{place_id}.example",
+    })
+    place.emails = [f"owner@{place_id}.example"]
+    return place
+
+
+def test_local_runner_maps_results_back_to_places(tmp_path):
+    places = [make_place("a"), make_place("b")]
+    LeadsBatch(FakeAgent(), places, LocalBatchRunner(echo), batch_dir=str(tmp_path), run_id="t").run()
+
+    for place in places:
+        assert place.ui_report == f"answer to ui https://{place.id}.example"
+        assert place.brief == f"answer to brief https://{place.id}.example"
+        assert place.pain_point_report == f"answer to pain {place.brief}"
+        assert place.email_subject == f"answer to subject Shop {place.id}"
+        assert place.email_sample == f"answer to email owner@{place.id}.example"
+        assert place.skip_reason is None
+
+
+def test_failed_request_leaves_only_its_field_unset(tmp_path):
+    def answer(body):
+        if "brief https://b.example" in body["input"][0]["content"][0]["text"]:
+            raise RuntimeError("rate limited")
+        return echo(body)
+
+    a, b = make_place("a"), make_place("b")
+    LeadsBatch(FakeAgent(), [a, b], LocalBatchRunner(answer), batch_dir=str(tmp_path), run_id="t").run()
+
+    assert a.email_sample is not None
+    assert b.ui_report is not None
+    assert b.brief is None and b.pain_point_report is None and b.email_sample is None
+
+
+def test_failed_wave_marks_places_unreported(tmp_path):
+    class FailingRunner:
+        def run(self, request_path, output_path):
+            raise RuntimeError("Batch b1 ended as failed without output")
+
+    places = [make_place("a"), make_place("b")]
+    LeadsBatch(FakeAgent(), places, FailingRunner(), batch_dir=str(tmp_path), run_id="t").run()
+
+    for place in places:
+        assert place.brief is None
+        assert "Batch wave 1 failed" in place.skip_reason
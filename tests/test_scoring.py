@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from place import Place
+from tools.scoring import score_places
+
+REVIEW_TEXTS = [
+    "Great service, friendly staff and fair prices.",
+    "Terrible experience, they never called back.",
+    "Okay I guess.",
+    "The worst booking system I have ever used, waited an hour!",
+    "",
+]
+EMAILS = ["info@shop.example", "john.smith@shop.example", "noreply@shop.example", "shop123@gmail.com"]
+
+
+def make_payload(rng, index):
+    payload = {"id": f"place-{index}", "displayName": {"text": f"Shop {index}"}}
+    status = rng.choice(["OPERATIONAL", "CLOSED_PERMANENTLY", "CLOSED_TEMPORARILY", None])
+    if status:
+        payload["businessStatus"] = status
+    rating = rng.choice([None, 0, 1.0, 2.5, 3.7, 4.4, 5.0, round(rng.uniform(1, 5), 1)])
+    if rating is not None:
+        payload["rating"] = rating
+    count = rng.choice([None, 0, 1, 9, 250, rng.randint(1, 5000)])
+    if count is not None:
+        payload["userRatingCount"] = count
+    if rng.random() < 0.5:
+        payload["reviewSummary"] = {"text": {"text": "People like it"}}
+    if rng.random() < 0.8:
+        payload["googleMapsUri"] = f"https://maps.example/{index}"
+    if rng.random() < 0.8:
+        payload["websiteUri"] = f"https://shop{index}.example"
+    reviews = [{"text": {"text": rng.choice(REVIEW_TEXTS)}} for _ in range(rng.choice([0, 0, 1, 3, 5, 8]))]
+    if reviews or rng.random() < 0.5:
+        payload["reviews"] = reviews
+    return payload
+
+
+def make_places(payloads, emails):
+    places = []
+    for payload, place_emails in zip(payloads, emails):
+        place = Place(payload)
+        place.emails = list(place_emails)  # as if enrich_emails had run
+        places.append(place)
+    return places
+
+
+def assert_matches_per_object_scores(payloads, emails):
+    base, lead = score_places(make_places(payloads, emails))
+    for i, place in enumerate(make_places(payloads, emails)):
+        assert base[i] == place.base_score(), payloads[i]
+        assert lead[i] == place.enrich_score(), payloads[i]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_score_places_matches_place_scores(seed):
+    rng = random.Random(seed)
+    payloads = [make_payload(rng, i) for i in range(200)]
+    emails = [rng.sample(EMAILS, rng.choice([0, 0, 1, 2])) for _ in payloads]
+    assert_matches_per_object_scores(payloads, emails)
+
+
+def test_score_places_edge_cases():
+    payloads = [
+        {"id": "no-rating", "businessStatus": "OPERATIONAL"},
+        {"id": "zero-rating", "businessStatus": "OPERATIONAL", "rating": 0, "userRatingCount": 12},
+        {"id": "rating-without-count", "businessStatus": "OPERATIONAL", "rating": 3.5},
+        {"id": "rating-zero-count", "businessStatus": "OPERATIONAL", "rating": 2.0, "userRatingCount": 0},
+        {"id": "closed", "businessStatus": "CLOSED_PERMANENTLY", "rating": 1.0, "userRatingCount": 900,
+         "websiteUri": "https://closed.example"},
+        {"id": "no-reviews", "businessStatus": "OPERATIONAL", "rating": 4.0, "userRatingCount": 40, "reviews": []},
+        {"id": "empty-payload"},
+    ]
+    emails = [[], ["info@a.example"], [], ["owner@b.example"], ["info@closed.example"], ["info@c.example"], []]
+    assert_matches_per_object_scores(payloads, emails)
+
+    base, _ = score_places(make_places(payloads, emails))
+    assert base[4] == 0.0  # closed businesses score nothing
@@ -0,0 +1,16 @@
+from parsers.website_parser import contact_page_candidates
+from parsers.website_snapshot import WebPage
+
+
+def test_contact_candidates_treat_www_as_the_same_site():
+    home = WebPage(
+        "https://www.shop.com/",
+        '<a href="https://www.shop.com/contact-us">Contact</a> <a href="/our-team">Team</a>'
+        ' <a href="https://shop.com/contact-us/">Contact</a> <a href="https://other.com/about">Other</a>',
+    )
+    assert contact_page_candidates("https://shop.com/", home) == [
+        "https://www.shop.com/contact-us",
+        "https://www.shop.com/our-team",
+        "https://shop.com/about",
+        "https://shop.com/about-us",
+    ]